@@ -1,10 +1,9 @@
 """Support for Dyson devices."""
 
 import asyncio
-from datetime import timedelta
-from functools import partial
 import logging
-from typing import List, Optional
+from time import monotonic
+from typing import List, Optional, Tuple
 
 from libdyson import (
     Dyson360Eye,
@@ -16,45 +15,74 @@ from libdyson import (
     MessageType,
     get_device,
 )
-from libdyson.discovery import DysonDiscovery
 from libdyson.dyson_device import DysonDevice
-from libdyson.exceptions import DysonException
 
-from homeassistant.components.zeroconf import async_get_instance
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.entity import Entity
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .connection import DysonConnectionManager
 from .const import (
+    CONF_ADAPTIVE_ENVIRONMENTAL,
     CONF_CREDENTIAL,
     CONF_DEVICE_TYPE,
+    CONF_ENVIRONMENTAL_INTERVAL,
     CONF_SERIAL,
+    DATA_CONNECTIONS,
     DATA_COORDINATORS,
     DATA_DEVICES,
     DATA_DISCOVERY,
+    DATA_DISPATCHERS,
+    DATA_HISTORY,
+    DATA_SCHEDULER,
+    DATA_SUPERVISORS,
+    DEFAULT_ADAPTIVE_ENVIRONMENTAL,
+    DEFAULT_ENVIRONMENTAL_INTERVAL,
     DOMAIN,
 )
+from .discovery import (
+    SOURCE_CONFIG,
+    DysonDiscoveryService,
+    async_get_discovery_service,
+)
+from .dispatcher import DysonDispatcher
+from .environmental import EnvironmentalScheduler
+from .history import AirQualityHistory
+from .supervisor import DysonSupervisor
 
 _LOGGER = logging.getLogger(__name__)
 
-ENVIRONMENTAL_DATA_UPDATE_INTERVAL = timedelta(seconds=30)
-
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up Dyson integration."""
+    # a config flow may have started the discovery service already
+    discovery = await async_get_discovery_service(hass)
+    history = AirQualityHistory(hass)
+    await history.async_load()
     hass.data[DOMAIN] = {
         DATA_DEVICES: {},
         DATA_COORDINATORS: {},
-        DATA_DISCOVERY: None,
+        DATA_DISCOVERY: discovery,
+        DATA_CONNECTIONS: DysonConnectionManager(hass),
+        DATA_SCHEDULER: EnvironmentalScheduler(hass),
+        DATA_DISPATCHERS: {},
+        DATA_HISTORY: history,
+        DATA_SUPERVISORS: {},
     }
+
+    @callback
+    def stop_discovery(_):
+        discovery.async_stop()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_discovery)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Dyson from a config entry."""
+    setup_at = monotonic()
     device = get_device(
         entry.data[CONF_SERIAL],
         entry.data[CONF_CREDENTIAL],
@@ -62,77 +90,96 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     if not isinstance(device, Dyson360Eye) and not isinstance(device, Dyson360Heurist):
-        # Set up coordinator
-        async def async_update_data():
-            """Poll environmental data from the device."""
-            try:
-                await hass.async_add_executor_job(device.request_environmental_data)
-            except DysonException as err:
-                raise UpdateFailed("Failed to request environmental data") from err
-
+        # only carries the outcome of the environmental requests, which the
+        # shared EnvironmentalScheduler makes and reports, it never refreshes
         coordinator = DataUpdateCoordinator(
             hass,
             _LOGGER,
             name="environmental",
-            update_method=async_update_data,
-            update_interval=ENVIRONMENTAL_DATA_UPDATE_INTERVAL,
+            update_interval=None,
         )
     else:
         coordinator = None
 
-    async def _async_forward_entry_setup():
+    @callback
+    def async_on_connected(host: str) -> None:
+        if entry.entry_id in hass.data[DOMAIN][DATA_DEVICES]:
+            # reconnected after an address change, platforms are set up
+            return
+        hass.data[DOMAIN][DATA_DEVICES][entry.entry_id] = device
+        hass.data[DOMAIN][DATA_COORDINATORS][entry.entry_id] = coordinator
+        dispatcher = DysonDispatcher(hass, device)
+        dispatcher.async_start()
+        hass.data[DOMAIN][DATA_DISPATCHERS][entry.entry_id] = dispatcher
+        supervisor = DysonSupervisor(hass, device, dispatcher, async_reconnect)
+        supervisor.async_start()
+        hass.data[DOMAIN][DATA_SUPERVISORS][entry.entry_id] = supervisor
+        if coordinator is not None:
+            hass.data[DOMAIN][DATA_SCHEDULER].async_add(
+                entry.entry_id,
+                device,
+                coordinator,
+                entry.options.get(
+                    CONF_ENVIRONMENTAL_INTERVAL, DEFAULT_ENVIRONMENTAL_INTERVAL
+                ),
+                entry.options.get(
+                    CONF_ADAPTIVE_ENVIRONMENTAL, DEFAULT_ADAPTIVE_ENVIRONMENTAL
+                ),
+            )
         for component in _async_get_platforms(device):
             hass.async_create_task(
                 hass.config_entries.async_forward_entry_setup(entry, component)
             )
 
-    def setup_entry(host: str, is_discovery: bool = True) -> bool:
-        try:
-            device.connect(host)
-        except DysonException:
-            if is_discovery:
-                _LOGGER.error(
-                    "Failed to connect to device %s at %s",
-                    device.serial,
-                    host,
-                )
-                return
-            raise ConfigEntryNotReady
-        hass.data[DOMAIN][DATA_DEVICES][entry.entry_id] = device
-        hass.data[DOMAIN][DATA_COORDINATORS][entry.entry_id] = coordinator
-        asyncio.run_coroutine_threadsafe(
-            _async_forward_entry_setup(), hass.loop
-        ).result()
+    @callback
+    def async_reconnect() -> bool:
+        if not entry.data.get(CONF_HOST):
+            # the session may have died because the device moved
+            discovery.async_rediscover(device.serial)
+        return connections.async_reconnect(entry.entry_id)
 
+    connections: DysonConnectionManager = hass.data[DOMAIN][DATA_CONNECTIONS]
+    discovery: DysonDiscoveryService = hass.data[DOMAIN][DATA_DISCOVERY]
     host = entry.data.get(CONF_HOST)
     if host:
-        await hass.async_add_executor_job(
-            partial(setup_entry, host, is_discovery=False)
+        connections.async_connect(
+            entry.entry_id, device, host, async_on_connected, SOURCE_CONFIG, setup_at
         )
     else:
-        discovery = hass.data[DOMAIN][DATA_DISCOVERY]
-        if discovery is None:
-            discovery = DysonDiscovery()
-            hass.data[DOMAIN][DATA_DISCOVERY] = discovery
-            _LOGGER.debug("Starting dyson discovery")
-            discovery.start_discovery(await async_get_instance(hass))
 
-            def stop_discovery(_):
-                _LOGGER.debug("Stopping dyson discovery")
-                discovery.stop_discovery()
+        @callback
+        def async_device_found(address: str, source: str) -> None:
+            connections.async_connect(
+                entry.entry_id, device, address, async_on_connected, source, setup_at
+            )
 
-            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_discovery)
-
-        await hass.async_add_executor_job(
-            discovery.register_device, device, setup_entry
-        )
+        discovery.async_register(device.serial, async_device_found)
 
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options."""
+    hass.data[DOMAIN][DATA_SCHEDULER].async_set_interval(
+        entry.entry_id,
+        entry.options.get(CONF_ENVIRONMENTAL_INTERVAL, DEFAULT_ENVIRONMENTAL_INTERVAL),
+        entry.options.get(CONF_ADAPTIVE_ENVIRONMENTAL, DEFAULT_ADAPTIVE_ENVIRONMENTAL),
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Dyson local."""
-    device = hass.data[DOMAIN][DATA_DEVICES][entry.entry_id]
+    hass.data[DOMAIN][DATA_CONNECTIONS].async_remove(entry.entry_id)
+    supervisor = hass.data[DOMAIN][DATA_SUPERVISORS].pop(entry.entry_id, None)
+    if supervisor is not None:
+        supervisor.async_stop()
+    hass.data[DOMAIN][DATA_SCHEDULER].async_remove(entry.entry_id)
+    hass.data[DOMAIN][DATA_DISCOVERY].async_unregister(entry.data[CONF_SERIAL])
+    device = hass.data[DOMAIN][DATA_DEVICES].get(entry.entry_id)
+    if device is None:
+        # never connected, no platform was set up
+        return True
     ok = all(
         await asyncio.gather(
             *[
@@ -144,8 +191,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if ok:
         hass.data[DOMAIN][DATA_DEVICES].pop(entry.entry_id)
         hass.data[DOMAIN][DATA_COORDINATORS].pop(entry.entry_id)
+        hass.data[DOMAIN][DATA_DISPATCHERS].pop(entry.entry_id).async_stop()
         await hass.async_add_executor_job(device.disconnect)
-        # TODO: stop discovery
     return ok
 
 
@@ -168,6 +215,9 @@ class DysonEntity(Entity):
     """Dyson entity base class."""
 
     _MESSAGE_TYPE = MessageType.STATE
+    # device properties the state is derived from, None to write on every
+    # message of _MESSAGE_TYPE
+    _FIELDS: Optional[Tuple[str, ...]] = None
 
     def __init__(self, device: DysonDevice, name: str):
         """Initialize the entity."""
@@ -176,11 +226,20 @@ class DysonEntity(Entity):
 
     async def async_added_to_hass(self) -> None:
         """Call when entity is added to hass."""
-        self._device.add_message_listener(self._on_message)
+        self._dispatcher: DysonDispatcher = self.hass.data[DOMAIN][DATA_DISPATCHERS][
+            self.platform.config_entry.entry_id
+        ]
+        self._supervisor: DysonSupervisor = self.hass.data[DOMAIN][DATA_SUPERVISORS][
+            self.platform.config_entry.entry_id
+        ]
+        self.async_on_remove(
+            self._dispatcher.async_add_entity(self, self._MESSAGE_TYPE, self._FIELDS)
+        )
 
-    def _on_message(self, message_type: MessageType) -> None:
-        if self._MESSAGE_TYPE is None or message_type == self._MESSAGE_TYPE:
-            self.schedule_update_ha_state()
+    @property
+    def available(self) -> bool:
+        """Return if the device is connected and responding."""
+        return self._supervisor.available
 
     @property
     def should_poll(self) -> bool:
@@ -25,6 +25,7 @@ from homeassistant.const import ATTR_TEMPERATURE, CONF_NAME, TEMP_CELSIUS
 from homeassistant.core import Callable, HomeAssistant
 
 from . import DysonEntity
+from .command import atomic
 from .const import DATA_DEVICES, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
@@ -51,6 +52,15 @@ async def async_setup_entry(
 class DysonClimateEntity(DysonEntity, ClimateEntity):
     """Dyson climate entity base class."""
 
+    _FIELDS = (
+        "is_on",
+        "heat_mode_is_on",
+        "heat_status_is_on",
+        "heat_target",
+        "temperature",
+        "humidity",
+    )
+
     @property
     def hvac_mode(self) -> str:
         """Return hvac operation."""
@@ -134,19 +144,22 @@ class DysonClimateEntity(DysonEntity, ClimateEntity):
     def set_hvac_mode(self, hvac_mode: str):
         """Set new hvac mode."""
         _LOGGER.debug("Set %s heat mode %s", self.name, hvac_mode)
-        if hvac_mode == HVAC_MODE_OFF:
-            self._device.turn_off()
-        elif not self._device.is_on:
-            self._device.turn_on()
-        if hvac_mode == HVAC_MODE_HEAT:
-            self._device.enable_heat_mode()
-        elif hvac_mode == HVAC_MODE_COOL:
-            self._device.disable_heat_mode()
+        with atomic(self._device):
+            if hvac_mode == HVAC_MODE_OFF:
+                self._device.turn_off()
+            elif not self._device.is_on:
+                self._device.turn_on()
+            if hvac_mode == HVAC_MODE_HEAT:
+                self._device.enable_heat_mode()
+            elif hvac_mode == HVAC_MODE_COOL:
+                self._device.disable_heat_mode()
 
 
 class DysonPureHotCoolLinkEntity(DysonClimateEntity):
     """Dyson Pure Hot+Cool Link entity."""
 
+    _FIELDS = DysonClimateEntity._FIELDS + ("focus_mode",)
+
     @property
     def fan_mode(self) -> str:
         """Return the fan setting."""
@@ -0,0 +1,93 @@
+"""Atomic commands for Dyson devices."""
+
+from contextlib import contextmanager
+import threading
+from typing import Iterator, Optional
+from weakref import WeakKeyDictionary
+
+from libdyson.dyson_device import DysonFanDevice
+
+_GUARD = threading.Lock()
+_TRANSACTIONS: "WeakKeyDictionary[DysonFanDevice, DysonTransaction]" = (
+    WeakKeyDictionary()
+)
+
+
+class DysonTransaction:
+    """Configuration changes of a device waiting to be sent together."""
+
+    def __init__(self, device: DysonFanDevice) -> None:
+        """Initialize the transaction."""
+        self.send = device._set_configuration
+        self.lock = threading.RLock()
+        self.owner: Optional[int] = None
+        self.depth = 0
+        self.data = {}
+        self.actions = 0
+        self.changes = 0
+        self.messages = 0
+
+    @property
+    def statistics(self) -> dict:
+        """Return command statistics."""
+        return {
+            "actions": self.actions,
+            "changes": self.changes,
+            "messages": self.messages,
+        }
+
+    def collect(self, **kwargs) -> None:
+        """Take the place of the device's _set_configuration meanwhile."""
+        if threading.get_ident() != self.owner:
+            # a setter called from another thread, outside of the transaction
+            self.send(**kwargs)
+            return
+        self.changes += 1
+        self.data.update(kwargs)
+
+
+@contextmanager
+def atomic(device: DysonFanDevice) -> Iterator[None]:
+    """Send the configuration changes made inside as one STATE-SET message.
+
+    Each libdyson setter publishes its own message, so an action made of
+    several of them takes the device through every intermediate state. Inside
+    the block the setters still run and validate their arguments, but their
+    changes are collected, later ones overriding earlier ones, and published
+    together on exit. Nothing is sent if the block raises. Blocks may nest,
+    the outermost one sends.
+    """
+    with _GUARD:
+        transaction = _TRANSACTIONS.get(device)
+        if transaction is None:
+            transaction = _TRANSACTIONS[device] = DysonTransaction(device)
+
+    with transaction.lock:
+        transaction.depth += 1
+        if transaction.depth == 1:
+            transaction.owner = threading.get_ident()
+            device._set_configuration = transaction.collect
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            transaction.depth -= 1
+            if transaction.depth == 0:
+                del device._set_configuration
+                transaction.owner = None
+                data = transaction.data
+                transaction.data = {}
+                # sent before the lock is released, so the messages of two
+                # actions on the device go out in the order they were made
+                if completed:
+                    transaction.actions += 1
+                    if data:
+                        transaction.messages += 1
+                        transaction.send(**data)
+
+
+def command_statistics(device: DysonFanDevice) -> Optional[dict]:
+    """Return command statistics of a device."""
+    transaction = _TRANSACTIONS.get(device)
+    return None if transaction is None else transaction.statistics
@@ -1,12 +1,10 @@
 """Config flow for Dyson integration."""
 
 import logging
-import threading
 from typing import Optional
 
 from libdyson import DEVICE_TYPE_NAMES, get_device, get_mqtt_info_from_wifi_info
 from libdyson.cloud import DysonDeviceInfo
-from libdyson.discovery import DysonDiscovery
 from libdyson.exceptions import (
     DysonException,
     DysonFailedToParseWifiInfo,
@@ -15,11 +13,21 @@ from libdyson.exceptions import (
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.components.zeroconf import async_get_instance
 from homeassistant.const import CONF_HOST, CONF_NAME
+from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import CONF_CREDENTIAL, CONF_DEVICE_TYPE, CONF_SERIAL, DOMAIN
+from .const import (
+    CONF_ADAPTIVE_ENVIRONMENTAL,
+    CONF_CREDENTIAL,
+    CONF_DEVICE_TYPE,
+    CONF_ENVIRONMENTAL_INTERVAL,
+    CONF_SERIAL,
+    DEFAULT_ADAPTIVE_ENVIRONMENTAL,
+    DEFAULT_ENVIRONMENTAL_INTERVAL,
+    DOMAIN,
+)
+from .discovery import async_get_discovery_service
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -45,6 +53,12 @@ class DysonLocalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize the config flow."""
         self._device_info = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry):
+        """Get the options flow for this handler."""
+        return DysonLocalOptionsFlow(config_entry)
+
     async def async_step_user(self, info: Optional[dict] = None):
         """Handle step initialized by user."""
         if info is not None:
@@ -232,35 +246,60 @@ class DysonLocalConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Try connect."""
         device = get_device(serial, credential, device_type)
 
-        # Find device using discovery
+        # Find device using the shared discovery and its address cache
         if not host:
-            discovered = threading.Event()
-
-            def _callback(address: str) -> None:
-                _LOGGER.debug("Found device at %s", address)
-                nonlocal host
-                host = address
-                discovered.set()
-
-            discovery = DysonDiscovery()
-            discovery.register_device(device, _callback)
-            discovery.start_discovery(await async_get_instance(self.hass))
-            succeed = await self.hass.async_add_executor_job(
-                discovered.wait, DISCOVERY_TIMEOUT
-            )
-            discovery.stop_discovery()
-            if not succeed:
+            discovery = await async_get_discovery_service(self.hass)
+            host = await discovery.async_find(serial, DISCOVERY_TIMEOUT)
+            if host is None:
                 _LOGGER.debug("Discovery timed out")
                 raise CannotFind
+            _LOGGER.debug("Found device at %s", host)
 
         # Try connect to the device
         try:
-            device.connect(host)
+            await self.hass.async_add_executor_job(device.connect, host)
         except DysonInvalidCredential:
             raise InvalidAuth
         except DysonException as err:
             _LOGGER.debug("Failed to connect to device: %s", err)
             raise CannotConnect
+        # the config entry sets up its own connection
+        await self.hass.async_add_executor_job(device.disconnect)
+
+
+class DysonLocalOptionsFlow(config_entries.OptionsFlow):
+    """Dyson local options flow."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry):
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, info: Optional[dict] = None):
+        """Manage the options."""
+        if info is not None:
+            return self.async_create_entry(title="", data=info)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_ENVIRONMENTAL_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_ENVIRONMENTAL_INTERVAL,
+                            DEFAULT_ENVIRONMENTAL_INTERVAL,
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                    vol.Optional(
+                        CONF_ADAPTIVE_ENVIRONMENTAL,
+                        default=self.config_entry.options.get(
+                            CONF_ADAPTIVE_ENVIRONMENTAL,
+                            DEFAULT_ADAPTIVE_ENVIRONMENTAL,
+                        ),
+                    ): bool,
+                }
+            ),
+        )
 
 
 class CannotConnect(HomeAssistantError):
@@ -0,0 +1,237 @@
+"""Connection manager for Dyson devices."""
+
+import asyncio
+from functools import partial
+import logging
+import random
+from time import monotonic
+from typing import Callable, Dict, Optional
+
+from libdyson.dyson_device import DysonDevice
+from libdyson.exceptions import DysonException, DysonInvalidCredential
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# connect attempts running at once, each one holds an executor thread
+MAX_PARALLEL_CONNECTS = 6
+# libdyson waits up to 10 s for the broker and 10 s more for the first state
+CONNECT_TIMEOUT = 25
+RETRY_INITIAL_DELAY = 2
+RETRY_MAX_DELAY = 300
+# random share of each retry delay, so devices dropped together do not all
+# come back at the same moment
+RETRY_JITTER = 0.5
+
+
+class DysonConnection:
+    """Connection attempts and their timing for a single device."""
+
+    def __init__(
+        self,
+        device: DysonDevice,
+        on_connected: Callable[[str], None],
+        setup_at: float,
+    ) -> None:
+        """Initialize the connection."""
+        self.device = device
+        self.on_connected = on_connected
+        self.setup_at = setup_at
+        self.host = None
+        self.source = None
+        self.task: Optional[asyncio.Task] = None
+        self.pending: Optional[asyncio.Future] = None
+        self.removed = False
+        self.connected = False
+        self.attempts = 0
+        self.failures = 0
+        self.last_error = None
+        self.connect_latency = None
+        self.attempt_latency = None
+        self.available_after = None
+
+    @property
+    def statistics(self) -> dict:
+        """Return connection statistics."""
+        return {
+            "host": self.host,
+            "source": self.source,
+            "connected": self.connected,
+            "attempts": self.attempts,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "connect_latency": self.connect_latency,
+            "attempt_latency": self.attempt_latency,
+            "available_after": self.available_after,
+        }
+
+
+class DysonConnectionManager:
+    """Connect Dyson devices in parallel and keep retrying in the background.
+
+    Config entries hand their device over and return right away instead of
+    raising ConfigEntryNotReady, so one slow or offline device neither holds
+    back the others nor lands on Home Assistant's slow retry schedule.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the manager."""
+        self._hass = hass
+        self._semaphore = asyncio.Semaphore(MAX_PARALLEL_CONNECTS)
+        self._connections: Dict[str, DysonConnection] = {}
+
+    @callback
+    def async_connect(
+        self,
+        entry_id: str,
+        device: DysonDevice,
+        host: str,
+        on_connected: Callable[[str], None],
+        source: str = None,
+        setup_at: float = None,
+    ) -> None:
+        """Start connecting a device, on_connected is called once it succeeds.
+
+        Calling it again with a new host moves the device over to it.
+        """
+        connection = self._connections.get(entry_id)
+        if connection is None:
+            connection = DysonConnection(
+                device, on_connected, monotonic() if setup_at is None else setup_at
+            )
+            self._connections[entry_id] = connection
+        if connection.task is not None:
+            connection.task.cancel()
+        connection.host = host
+        connection.source = source
+        connection.task = self._hass.async_create_task(
+            self._async_connect(connection)
+        )
+
+    @callback
+    def async_reconnect(self, entry_id: str) -> bool:
+        """Reconnect a device at its current host, unless already connecting."""
+        connection = self._connections.get(entry_id)
+        if connection is None or connection.task is not None:
+            return False
+        connection.task = self._hass.async_create_task(
+            self._async_connect(connection)
+        )
+        return True
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Stop connecting a device and forget about it."""
+        connection = self._connections.pop(entry_id, None)
+        if connection is None:
+            return
+        connection.removed = True
+        if connection.task is not None:
+            connection.task.cancel()
+
+    def statistics(self, entry_id: str) -> Optional[dict]:
+        """Return connection statistics of a config entry."""
+        connection = self._connections.get(entry_id)
+        return None if connection is None else connection.statistics
+
+    async def _async_connect(self, connection: DysonConnection) -> None:
+        if connection.connected:
+            # the device moved to another address
+            connection.connected = False
+            await self._hass.async_add_executor_job(connection.device.disconnect)
+        started_at = monotonic()
+        delay = RETRY_INITIAL_DELAY
+        while True:
+            try:
+                await self._async_attempt(connection)
+            except DysonInvalidCredential:
+                _LOGGER.error(
+                    "Invalid credential for device %s, not retrying",
+                    connection.device.serial,
+                )
+                connection.last_error = "invalid_credential"
+                connection.task = None
+                return
+            except (DysonException, asyncio.TimeoutError) as err:
+                connection.failures += 1
+                connection.last_error = type(err).__name__
+                wait = delay * (1 + random.uniform(-RETRY_JITTER, RETRY_JITTER))
+                _LOGGER.debug(
+                    "Failed to connect to device %s at %s (%s), retrying in %d s",
+                    connection.device.serial,
+                    connection.host,
+                    connection.last_error,
+                    wait,
+                )
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+                continue
+            break
+
+        connection.connected = True
+        connection.connect_latency = round(monotonic() - started_at, 3)
+        if connection.available_after is None:
+            connection.available_after = round(monotonic() - connection.setup_at, 3)
+        connection.task = None
+        _LOGGER.info(
+            "Connected to device %s at %s in %.1f s after %d attempts",
+            connection.device.serial,
+            connection.host,
+            connection.connect_latency,
+            connection.attempts,
+        )
+        connection.on_connected(connection.host)
+
+    async def _async_attempt(self, connection: DysonConnection) -> None:
+        if connection.pending is not None:
+            # an attempt that timed out earlier is still running, it has to
+            # finish before the device can be connected again
+            future = connection.pending
+            connection.pending = None
+            try:
+                await self._async_wait(connection, future, CONNECT_TIMEOUT)
+                return
+            except DysonException:
+                pass
+
+        await self._semaphore.acquire()
+        try:
+            future = self._hass.async_add_executor_job(
+                connection.device.connect, connection.host
+            )
+        except BaseException:
+            self._semaphore.release()
+            raise
+        # the thread is held until connect returns, even after a timeout, so
+        # the slot is only given back then
+        future.add_done_callback(self._release_slot)
+        connection.attempts += 1
+        attempt_started_at = monotonic()
+        await self._async_wait(connection, future, CONNECT_TIMEOUT)
+        connection.attempt_latency = round(monotonic() - attempt_started_at, 3)
+
+    def _release_slot(self, future: asyncio.Future) -> None:
+        self._semaphore.release()
+
+    async def _async_wait(
+        self,
+        connection: DysonConnection,
+        future: asyncio.Future,
+        timeout: Optional[float],
+    ) -> None:
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if connection.removed:
+                # unloaded meanwhile, do not leave the device connected
+                future.add_done_callback(
+                    partial(self._disconnect_late, connection.device)
+                )
+            else:
+                connection.pending = future
+            raise
+
+    def _disconnect_late(self, device: DysonDevice, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self._hass.async_add_executor_job(device.disconnect)
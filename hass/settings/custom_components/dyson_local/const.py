@@ -5,7 +5,17 @@ DOMAIN = "dyson_local"
 CONF_SERIAL = "serial"
 CONF_CREDENTIAL = "credential"
 CONF_DEVICE_TYPE = "device_type"
+CONF_ENVIRONMENTAL_INTERVAL = "environmental_interval"
+CONF_ADAPTIVE_ENVIRONMENTAL = "adaptive_environmental"
+
+DEFAULT_ENVIRONMENTAL_INTERVAL = 30
+DEFAULT_ADAPTIVE_ENVIRONMENTAL = True
 
 DATA_DEVICES = "devices"
 DATA_DISCOVERY = "discovery"
 DATA_COORDINATORS = "coordinators"
+DATA_CONNECTIONS = "connections"
+DATA_SCHEDULER = "scheduler"
+DATA_DISPATCHERS = "dispatchers"
+DATA_HISTORY = "history"
+DATA_SUPERVISORS = "supervisors"
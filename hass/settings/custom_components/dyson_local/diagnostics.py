@@ -0,0 +1,30 @@
+"""Diagnostics support for Dyson Local."""
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .command import command_statistics
+from .const import (
+    DATA_CONNECTIONS,
+    DATA_DEVICES,
+    DATA_DISPATCHERS,
+    DATA_SCHEDULER,
+    DATA_SUPERVISORS,
+    DOMAIN,
+)
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a config entry."""
+    device = hass.data[DOMAIN][DATA_DEVICES].get(entry.entry_id)
+    dispatcher = hass.data[DOMAIN][DATA_DISPATCHERS].get(entry.entry_id)
+    supervisor = hass.data[DOMAIN][DATA_SUPERVISORS].get(entry.entry_id)
+    return {
+        "connection": hass.data[DOMAIN][DATA_CONNECTIONS].statistics(entry.entry_id),
+        "environmental": hass.data[DOMAIN][DATA_SCHEDULER].statistics(entry.entry_id),
+        "health": None if supervisor is None else supervisor.statistics,
+        "updates": None if dispatcher is None else dispatcher.statistics,
+        "commands": None if device is None else command_statistics(device),
+    }
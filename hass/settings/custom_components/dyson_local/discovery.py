@@ -0,0 +1,190 @@
+"""Dyson device discovery with a last known address cache."""
+
+import asyncio
+import logging
+import socket
+from typing import Callable, Dict, List, Optional
+
+from libdyson.discovery import TYPE_DYSON_360_EYE, TYPE_DYSON_FAN
+from zeroconf import ServiceBrowser, ServiceInfo, Zeroconf
+
+from homeassistant.components.zeroconf import async_get_instance
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_DISCOVERY, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.addresses"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+SOURCE_CONFIG = "config"
+SOURCE_CACHE = "cache"
+SOURCE_DISCOVERY = "discovery"
+
+
+class DysonDiscoveryService:
+    """Find Dyson devices on the network, starting from their last known address.
+
+    A registered device is handed its cached address right away. Zeroconf
+    discovery only runs to catch address changes and stops once every
+    registered device has been seen and no config flow is waiting for one.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the service."""
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._addresses: Dict[str, str] = {}
+        self._callbacks: Dict[str, Callable[[str, str], None]] = {}
+        self._found = set()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._browser: Optional[ServiceBrowser] = None
+
+    async def async_load(self) -> None:
+        """Load cached addresses."""
+        stored = await self._store.async_load() or {}
+        # keep whatever discovery found while loading
+        self._addresses = {**stored, **self._addresses}
+
+    @callback
+    def async_register(
+        self, serial: str, device_found: Callable[[str, str], None]
+    ) -> None:
+        """Register a device, device_found gets its address and where it came from."""
+        self._callbacks[serial] = device_found
+        address = self._addresses.get(serial)
+        if address is not None:
+            device_found(address, SOURCE_CACHE)
+        if serial not in self._found:
+            self._hass.async_create_task(self.async_start())
+
+    @callback
+    def async_unregister(self, serial: str) -> None:
+        """Unregister a device."""
+        self._callbacks.pop(serial, None)
+        self._async_stop_if_done()
+
+    @callback
+    def async_rediscover(self, serial: str) -> None:
+        """Look for a registered device again, its address may have changed."""
+        self._found.discard(serial)
+        if serial in self._callbacks:
+            self._hass.async_create_task(self.async_start())
+
+    def get_address(self, serial: str) -> Optional[str]:
+        """Return the last known address of a device."""
+        return self._addresses.get(serial)
+
+    async def async_find(self, serial: str, timeout: float) -> Optional[str]:
+        """Return the address of a device, waiting up to timeout for discovery.
+
+        A device not seen in time falls back to its cached address, if any.
+        """
+        if serial in self._found:
+            return self._addresses[serial]
+        future = self._hass.loop.create_future()
+        self._waiters.setdefault(serial, []).append(future)
+        try:
+            await self.async_start()
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return self._addresses.get(serial)
+        finally:
+            waiters = self._waiters.get(serial, [])
+            if future in waiters:
+                waiters.remove(future)
+            if len(waiters) == 0:
+                self._waiters.pop(serial, None)
+            self._async_stop_if_done()
+
+    async def async_start(self) -> None:
+        """Start zeroconf discovery, unless it is running already."""
+        zeroconf = await async_get_instance(self._hass)
+        if self._browser is not None or self._is_done():
+            return
+        _LOGGER.debug("Starting dyson discovery")
+        self._browser = ServiceBrowser(
+            zeroconf,
+            [TYPE_DYSON_360_EYE, TYPE_DYSON_FAN],
+            DysonDiscoveryListener(self._hass, self),
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop zeroconf discovery."""
+        if self._browser is None:
+            return
+        _LOGGER.debug("Stopping dyson discovery")
+        self._browser.cancel()
+        self._browser = None
+
+    @callback
+    def async_device_discovered(self, serial: str, address: str) -> None:
+        """Handle a device seen on the network."""
+        self._found.add(serial)
+        for future in self._waiters.pop(serial, []):
+            if not future.done():
+                future.set_result(address)
+        if self._addresses.get(serial) != address:
+            _LOGGER.debug("Found device %s at %s", serial, address)
+            self._addresses[serial] = address
+            self._store.async_delay_save(lambda: self._addresses, SAVE_DELAY)
+            device_found = self._callbacks.get(serial)
+            if device_found is not None:
+                device_found(address, SOURCE_DISCOVERY)
+        self._async_stop_if_done()
+
+    @callback
+    def _async_stop_if_done(self) -> None:
+        if self._is_done():
+            self.async_stop()
+
+    def _is_done(self) -> bool:
+        return len(self._waiters) == 0 and all(
+            serial in self._found for serial in self._callbacks
+        )
+
+
+async def async_get_discovery_service(hass: HomeAssistant) -> DysonDiscoveryService:
+    """Return the discovery service shared by config entries and config flows."""
+    hass.data.setdefault(DOMAIN, {})
+    discovery = hass.data[DOMAIN].get(DATA_DISCOVERY)
+    if discovery is None:
+        # stored before loading so concurrent callers share it
+        discovery = hass.data[DOMAIN][DATA_DISCOVERY] = DysonDiscoveryService(hass)
+        await discovery.async_load()
+    return discovery
+
+
+class DysonDiscoveryListener:
+    """Listener for zeroconf events."""
+
+    def __init__(self, hass: HomeAssistant, service: DysonDiscoveryService):
+        """Initialize the listener."""
+        self._hass = hass
+        self._service = service
+
+    def add_service(self, zeroconf: Zeroconf, type: str, name: str) -> None:
+        """Add a new service."""
+        self._service_seen(zeroconf.get_service_info(type, name))
+
+    def update_service(self, zeroconf: Zeroconf, type: str, name: str) -> None:
+        """Update a service, its address may have changed."""
+        self._service_seen(zeroconf.get_service_info(type, name))
+
+    def remove_service(self, zeroconf: Zeroconf, type: str, name: str) -> None:
+        """Remove a service."""
+        # Currently not doing anything
+
+    def _service_seen(self, info: Optional[ServiceInfo]) -> None:
+        if info is None or len(info.addresses) == 0:
+            return
+        if info.type == TYPE_DYSON_360_EYE:
+            serial = (info.name.split(".")[0]).split("-", 1)[1]
+        else:  # TYPE_DYSON_FAN
+            serial = (info.name.split(".")[0]).split("_")[1]
+        address = socket.inet_ntoa(info.addresses[0])
+        self._hass.add_job(self._service.async_device_discovered, serial, address)
@@ -0,0 +1,210 @@
+"""Per device state update dispatching for Dyson entities."""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from libdyson import MessageType
+from libdyson.dyson_device import DysonDevice
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DysonDispatcher:
+    """Forward device messages to the entities of one device.
+
+    libdyson calls its listeners from the MQTT thread. Rather than every
+    entity scheduling its own state write for every message, a single
+    listener collects the message types and hands them to the event loop in
+    one callback. Entities of a message type whose data did not change are
+    not written.
+
+    Entities that declare the device fields they are derived from are only
+    written when one of those fields changed, whatever the message type.
+    """
+
+    def __init__(self, hass: HomeAssistant, device: DysonDevice) -> None:
+        """Initialize the dispatcher."""
+        self._hass = hass
+        self._device = device
+        self._entities: Dict[MessageType, Set[Entity]] = {}
+        self._lock = threading.Lock()
+        self._pending: Set[MessageType] = set()
+        self._scheduled = False
+        self._field_entities: Dict[Entity, Tuple[str, ...]] = {}
+        self._listeners: Dict[MessageType, List[Callable[[], None]]] = {}
+        self._snapshots: Dict[MessageType, str] = {}
+        self._connected: Optional[bool] = None
+        self._values: Dict[str, Any] = {}
+        self.messages = 0
+        self.dispatches = 0
+        self.state_writes = 0
+        self.skipped_writes = 0
+
+    @property
+    def statistics(self) -> dict:
+        """Return dispatching statistics."""
+        return {
+            "messages": self.messages,
+            "dispatches": self.dispatches,
+            "state_writes": self.state_writes,
+            "skipped_writes": self.skipped_writes,
+            "state_writes_per_message": round(self.state_writes / self.messages, 2)
+            if self.messages
+            else None,
+        }
+
+    @callback
+    def async_start(self) -> None:
+        """Start listening to device messages."""
+        self._device.add_message_listener(self._on_message)
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop listening to device messages."""
+        self._device.remove_message_listener(self._on_message)
+
+    @callback
+    def async_add_entity(
+        self,
+        entity: Entity,
+        message_type: MessageType,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> Callable[[], None]:
+        """Register an entity and return a callback removing it.
+
+        An entity with fields is written when one of them changes, any other
+        when data of its message type changes. A message type of None stands
+        for all types.
+        """
+        if fields is not None:
+            self._field_entities[entity] = fields
+            for field in fields:
+                if field not in self._values:
+                    self._values[field] = self._read(field)
+            types = []
+        elif message_type is None:
+            types = list(MessageType)
+        else:
+            types = [message_type]
+        for type_ in types:
+            self._entities.setdefault(type_, set()).add(entity)
+
+        @callback
+        def remove_entity() -> None:
+            self._field_entities.pop(entity, None)
+            for type_ in types:
+                self._entities[type_].discard(entity)
+
+        return remove_entity
+
+    @callback
+    def async_add_listener(
+        self, message_type: MessageType, listener: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Call listener on the loop for every dispatch of a message type.
+
+        It is called whether the data changed or not, returns a callback
+        removing the listener.
+        """
+        self._listeners.setdefault(message_type, []).append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners[message_type].remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_write_all(self) -> None:
+        """Write the state of every entity, when their availability changed."""
+        # the written states are the baseline of the next field diff
+        self._refresh_values()
+        entities = set(self._field_entities)
+        for entities_of_type in self._entities.values():
+            entities.update(entities_of_type)
+        for entity in entities:
+            self.state_writes += 1
+            entity.async_write_ha_state()
+
+    def _on_message(self, message_type: MessageType) -> None:
+        with self._lock:
+            self.messages += 1
+            self._pending.add(message_type)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._hass.loop.call_soon_threadsafe(self._async_dispatch)
+
+    @callback
+    def _async_dispatch(self) -> None:
+        with self._lock:
+            pending = self._pending
+            self._pending = set()
+            self._scheduled = False
+        self.dispatches += 1
+
+        entities = set()
+        changed = False
+        for message_type in pending:
+            for listener in self._listeners.get(message_type, ()):
+                listener()
+            snapshot = self._snapshot(message_type)
+            if self._snapshots.get(message_type) == snapshot:
+                continue
+            self._snapshots[message_type] = snapshot
+            changed = True
+            entities.update(self._entities.get(message_type, ()))
+
+        connected = self._device.is_connected
+        if connected != self._connected:
+            # availability of every entity follows the connection
+            self._connected = connected
+            self.async_write_all()
+            return
+        if changed and len(self._field_entities) > 0:
+            changed_fields = self._refresh_values()
+            for entity, fields in self._field_entities.items():
+                if changed_fields.intersection(fields):
+                    entities.add(entity)
+                else:
+                    self.skipped_writes += 1
+
+        for entity in entities:
+            self.state_writes += 1
+            entity.async_write_ha_state()
+
+    def _refresh_values(self) -> Set[str]:
+        changed_fields = set()
+        for field, previous in self._values.items():
+            value = self._read(field)
+            if value != previous:
+                self._values[field] = value
+                changed_fields.add(field)
+        return changed_fields
+
+    def _read(self, field: str) -> Any:
+        try:
+            return getattr(self._device, field)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # no payload carrying the field has arrived yet
+            return None
+
+    def _snapshot(self, message_type: MessageType) -> str:
+        # libdyson keeps the last payload of each message type and derives
+        # every property from it, so an equal payload means equal states
+        if message_type == MessageType.ENVIRONMENTAL:
+            data = getattr(self._device, "_environmental_data", None)
+        else:
+            data = getattr(self._device, "_status", None)
+        if isinstance(data, dict):
+            # state changes carry [old, new] pairs, only the new value counts
+            data = {
+                key: value[-1] if isinstance(value, list) else value
+                for key, value in data.items()
+                if key not in ("msg", "time")
+            }
+        return repr(data)
@@ -0,0 +1,274 @@
+"""Shared environmental data polling for Dyson devices."""
+
+from collections import deque
+import logging
+import random
+from time import monotonic
+from typing import Dict, List, Optional
+
+from libdyson.dyson_device import DysonFanDevice
+from libdyson.exceptions import DysonException
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+_LOGGER = logging.getLogger(__name__)
+
+# polls falling due this close together go to the executor as one job
+BATCH_WINDOW = 0.5
+# random share of the interval added to each poll so devices drift apart
+JITTER = 0.05
+
+# adaptive sampling, seconds
+ADAPTIVE_MIN_INTERVAL = 5
+ADAPTIVE_MAX_INTERVAL = 120
+AUTO_MODE_INTERVAL = 10
+# readings moving less than this between two polls count as stable
+DEADBANDS = {
+    "particulate_matter_2_5": 2,
+    "particulate_matter_10": 3,
+    "particulates": 1,
+    "volatile_organic_compounds": 1,
+    "nitrogen_dioxide": 1,
+    "formaldehyde": 2,
+    "humidity": 2,
+    "temperature": 0.5,
+}
+# a move this many deadbands wide is a spike
+SPIKE_FACTOR = 4
+SPIKE_SAMPLES = 50
+
+
+class ScheduledDevice:
+    """Polling state of a single device."""
+
+    def __init__(
+        self,
+        device: DysonFanDevice,
+        coordinator: DataUpdateCoordinator,
+        interval: float,
+        adaptive: bool,
+        next_due: float,
+    ) -> None:
+        """Initialize the scheduled device."""
+        self.device = device
+        self.coordinator = coordinator
+        self.base_interval = interval
+        self.interval = interval
+        self.adaptive = adaptive
+        self.next_due = next_due
+        self.last_poll_at = None
+        self.readings = {}
+        self.polls = 0
+        self.failures = 0
+        self.fixed_polls = 0.0
+        self.spikes = 0
+        self.spike_latencies = deque(maxlen=SPIKE_SAMPLES)
+
+    @property
+    def statistics(self) -> dict:
+        """Return polling statistics."""
+        latencies = sorted(self.spike_latencies)
+        return {
+            "interval": self.interval,
+            "base_interval": self.base_interval,
+            "adaptive": self.adaptive,
+            "polls": self.polls,
+            "failures": self.failures,
+            "polls_saved": round(self.fixed_polls - self.polls),
+            "spikes": self.spikes,
+            "spike_detection_latency_max": latencies[-1] if latencies else None,
+            "spike_detection_latency_median": latencies[len(latencies) // 2]
+            if latencies
+            else None,
+        }
+
+    def polled(self, now: float) -> None:
+        """Account for a poll and pick the interval until the next one."""
+        since_last_poll = None
+        if self.last_poll_at is not None:
+            since_last_poll = now - self.last_poll_at
+            self.fixed_polls += since_last_poll / self.base_interval
+        self.last_poll_at = now
+        if not self.adaptive:
+            self.interval = self.base_interval
+            return
+
+        # the readings answer the previous request, compare with the one before
+        readings = {}
+        for field in DEADBANDS:
+            try:
+                value = getattr(self.device, field, None)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if isinstance(value, (int, float)) and value >= 0:
+                readings[field] = value
+        moves = [
+            abs(value - self.readings[field]) / DEADBANDS[field]
+            for field, value in readings.items()
+            if field in self.readings
+        ]
+        self.readings = readings
+        move = max(moves, default=0)
+
+        ceiling = max(ADAPTIVE_MAX_INTERVAL, self.base_interval)
+        if getattr(self.device, "auto_mode", False):
+            # the fan reacts to air quality on its own, keep up with it
+            ceiling = min(ceiling, AUTO_MODE_INTERVAL)
+        if move >= SPIKE_FACTOR:
+            self.spikes += 1
+            if since_last_poll is not None:
+                self.spike_latencies.append(round(since_last_poll, 1))
+            interval = ADAPTIVE_MIN_INTERVAL
+        elif move >= 1:
+            interval = min(
+                self.base_interval, max(ADAPTIVE_MIN_INTERVAL, self.interval / 2)
+            )
+        else:
+            interval = self.interval * 2
+        self.interval = max(ADAPTIVE_MIN_INTERVAL, min(interval, ceiling))
+
+
+class EnvironmentalScheduler:
+    """Request environmental data for every Dyson device from one timer.
+
+    A device joining the schedule takes the middle of the widest gap left by
+    the others, so polls are spread over the interval instead of all devices
+    set up at the same moment polling in lockstep. Polls falling due
+    together are sent from a single executor job.
+
+    With adaptive sampling the interval doubles, up to minutes, while
+    readings stay within their deadband and drops to seconds on a spike or
+    while the fan runs in auto mode.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._devices: Dict[str, ScheduledDevice] = {}
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+        self._batches = 0
+
+    @callback
+    def async_add(
+        self,
+        entry_id: str,
+        device: DysonFanDevice,
+        coordinator: DataUpdateCoordinator,
+        interval: float,
+        adaptive: bool,
+    ) -> None:
+        """Start polling a device."""
+        now = monotonic()
+        self._devices[entry_id] = ScheduledDevice(
+            device,
+            coordinator,
+            interval,
+            adaptive,
+            now + self._widest_gap(now, interval),
+        )
+        self._async_schedule()
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        """Stop polling a device."""
+        self._devices.pop(entry_id, None)
+        self._async_schedule()
+
+    @callback
+    def async_set_interval(
+        self, entry_id: str, interval: float, adaptive: bool
+    ) -> None:
+        """Change the polling interval of a device."""
+        scheduled = self._devices.get(entry_id)
+        if scheduled is None:
+            return
+        scheduled.adaptive = adaptive
+        if scheduled.base_interval == interval:
+            return
+        scheduled.next_due = min(
+            scheduled.next_due, scheduled.next_due - scheduled.interval + interval
+        )
+        scheduled.base_interval = interval
+        scheduled.interval = interval
+        self._async_schedule()
+
+    def statistics(self, entry_id: str) -> Optional[dict]:
+        """Return polling statistics of a config entry."""
+        scheduled = self._devices.get(entry_id)
+        if scheduled is None:
+            return None
+        return dict(scheduled.statistics, batches=self._batches)
+
+    def _widest_gap(self, now: float, interval: float) -> float:
+        offsets = sorted(
+            (scheduled.next_due - now) % interval for scheduled in self._devices.values()
+        )
+        if len(offsets) == 0:
+            return random.uniform(0, interval)
+        gaps = [
+            (offsets[0] + interval - offsets[-1], offsets[-1])
+        ] + [
+            (offsets[index + 1] - offsets[index], offsets[index])
+            for index in range(len(offsets) - 1)
+        ]
+        width, start = max(gaps)
+        return (start + width / 2) % interval
+
+    @callback
+    def _async_schedule(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if len(self._devices) == 0:
+            return
+        next_due = min(scheduled.next_due for scheduled in self._devices.values())
+        self._unsub_timer = async_call_later(
+            self._hass, max(next_due - monotonic(), 0), self._async_poll
+        )
+
+    async def _async_poll(self, _now=None) -> None:
+        self._unsub_timer = None
+        now = monotonic()
+        due = [
+            scheduled
+            for scheduled in self._devices.values()
+            if scheduled.next_due <= now + BATCH_WINDOW
+        ]
+        for scheduled in due:
+            scheduled.polled(now)
+            scheduled.next_due = now + scheduled.interval * (
+                1 + random.uniform(-JITTER, JITTER)
+            )
+        self._async_schedule()
+        if len(due) == 0:
+            return
+
+        self._batches += 1
+        errors = await self._hass.async_add_executor_job(self._request, due)
+        for scheduled, error in zip(due, errors):
+            scheduled.polls += 1
+            if error is None:
+                scheduled.coordinator.async_set_updated_data(None)
+            else:
+                scheduled.failures += 1
+                scheduled.coordinator.async_set_update_error(
+                    UpdateFailed("Failed to request environmental data")
+                )
+
+    @staticmethod
+    def _request(due: List[ScheduledDevice]) -> List[Optional[Exception]]:
+        errors = []
+        for scheduled in due:
+            try:
+                scheduled.device.request_environmental_data()
+                errors.append(None)
+            except DysonException as err:
+                _LOGGER.debug(
+                    "Failed to request environmental data from %s: %s",
+                    scheduled.device.serial,
+                    err,
+                )
+                errors.append(err)
+        return errors
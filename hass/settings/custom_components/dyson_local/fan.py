@@ -28,6 +28,7 @@ from homeassistant.util.percentage import (
 )
 
 from . import DOMAIN, DysonEntity
+from .command import atomic
 from .const import DATA_DEVICES
 
 _LOGGER = logging.getLogger(__name__)
@@ -85,6 +86,7 @@ class DysonFanEntity(DysonEntity, FanEntity):
     """Dyson fan entity base class."""
 
     _MESSAGE_TYPE = MessageType.STATE
+    _FIELDS = ("is_on", "speed", "auto_mode", "oscillation")
 
     @property
     def is_on(self) -> bool:
@@ -117,8 +119,9 @@ class DysonFanEntity(DysonEntity, FanEntity):
             return
 
         dyson_speed = math.ceil(percentage_to_ranged_value(SPEED_RANGE, percentage))
-        self._device.set_speed(dyson_speed)
-        self._device.disable_auto_mode()
+        with atomic(self._device):
+            self._device.set_speed(dyson_speed)
+            self._device.disable_auto_mode()
 
     @property
     def preset_modes(self) -> List[str]:
@@ -157,12 +160,13 @@ class DysonFanEntity(DysonEntity, FanEntity):
     ) -> None:
         """Turn on the fan."""
         _LOGGER.debug("Turn on fan %s with percentage %s", self.name, percentage)
-        if preset_mode:
-            self.set_preset_mode(preset_mode)
-        if percentage:
-            self.set_percentage(percentage)
+        with atomic(self._device):
+            if preset_mode:
+                self.set_preset_mode(preset_mode)
+            if percentage:
+                self.set_percentage(percentage)
 
-        self._device.turn_on()
+            self._device.turn_on()
 
     def turn_off(self, **kwargs) -> None:
         """Turn off the fan."""
@@ -192,6 +196,12 @@ class DysonPureCoolLinkEntity(DysonFanEntity):
 class DysonPureCoolEntity(DysonFanEntity):
     """Dyson Pure Cool entity."""
 
+    _FIELDS = DysonFanEntity._FIELDS + (
+        "front_airflow",
+        "oscillation_angle_low",
+        "oscillation_angle_high",
+    )
+
     @property
     def supported_features(self) -> int:
         """Flag supported features."""
@@ -246,6 +256,8 @@ class DysonPureCoolEntity(DysonFanEntity):
 class DysonPureHumidifyCoolEntity(DysonFanEntity):
     """Dyson Pure Humidify+Cool entity."""
 
+    _FIELDS = DysonFanEntity._FIELDS + ("front_airflow",)
+
     @property
     def supported_features(self) -> int:
         """Flag supported features."""
@@ -0,0 +1,172 @@
+"""Downsampled air quality history for Dyson sensors."""
+
+from array import array
+import base64
+import logging
+from time import time
+from typing import Dict, List, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.history"
+STORAGE_VERSION = 1
+SAVE_DELAY = 600
+
+# name: (seconds per bucket, buckets kept)
+RESOLUTIONS = {
+    "minute": (60, 1440),
+    "hour": (3600, 720),
+    "day": (86400, 365),
+}
+
+
+class Rollup:
+    """Minimum, maximum and mean of a series at one resolution.
+
+    Buckets live in a ring of fixed size arrays indexed by bucket number, so
+    adding a reading never allocates and old buckets are overwritten in
+    place.
+    """
+
+    ARRAYS = (
+        ("buckets", "i"),
+        ("minimums", "d"),
+        ("maximums", "d"),
+        ("sums", "d"),
+        ("counts", "I"),
+    )
+
+    def __init__(self, seconds: int, size: int, data: Optional[dict] = None) -> None:
+        """Initialize the rollup, from stored data if there is any."""
+        self.seconds = seconds
+        self.size = size
+        for name, typecode in self.ARRAYS:
+            values = array(typecode)
+            if data is not None and name in data:
+                raw = base64.b64decode(data[name])
+                if typecode == "d" and len(raw) == size * array("f").itemsize:
+                    # minimums and maximums used to be single precision
+                    values.extend(float(f"{value:.7g}") for value in array("f", raw))
+                else:
+                    values.frombytes(raw)
+            if len(values) != size:
+                values = array(typecode, [0]) * size
+            setattr(self, name, values)
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a reading."""
+        bucket = int(timestamp // self.seconds)
+        slot = bucket % self.size
+        if self.counts[slot] == 0 or self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.minimums[slot] = value
+            self.maximums[slot] = value
+            self.sums[slot] = value
+            self.counts[slot] = 1
+            return
+        if value < self.minimums[slot]:
+            self.minimums[slot] = value
+        if value > self.maximums[slot]:
+            self.maximums[slot] = value
+        self.sums[slot] += value
+        self.counts[slot] += 1
+
+    def query(self, start: float, end: float) -> List[dict]:
+        """Return the buckets starting between start and end, oldest first."""
+        first = int(start // self.seconds)
+        last = int(end // self.seconds)
+        slots = sorted(
+            (self.buckets[slot], slot)
+            for slot in range(self.size)
+            if self.counts[slot] > 0 and first <= self.buckets[slot] <= last
+        )
+        return [
+            {
+                "start": dt_util.utc_from_timestamp(bucket * self.seconds).isoformat(),
+                "min": self.minimums[slot],
+                "max": self.maximums[slot],
+                "mean": round(self.sums[slot] / self.counts[slot], 2),
+                "samples": self.counts[slot],
+            }
+            for bucket, slot in slots
+        ]
+
+    def as_dict(self) -> dict:
+        """Return the arrays for storage."""
+        return {
+            name: base64.b64encode(getattr(self, name).tobytes()).decode("ascii")
+            for name, _ in self.ARRAYS
+        }
+
+
+class AirQualityHistory:
+    """Rollups of the air quality readings of every Dyson sensor.
+
+    Readings are kept in memory and written to storage ten minutes after the
+    first unsaved one, so charts over weeks are served from a few thousand
+    buckets per sensor instead of the recorder's state tables.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the history."""
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._stored: Dict[str, dict] = {}
+        self._series: Dict[str, Dict[str, Rollup]] = {}
+        self._save_pending = False
+
+    async def async_load(self) -> None:
+        """Load stored rollups."""
+        self._stored = await self._store.async_load() or {}
+
+    @callback
+    def async_add(self, key: str, value: float, timestamp: float = None) -> None:
+        """Add a reading to the series of a sensor."""
+        if timestamp is None:
+            timestamp = time()
+        for rollup in self._get_series(key).values():
+            rollup.add(timestamp, value)
+        # every call would push the delayed save back, readings come in faster
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_query(
+        self,
+        key: str,
+        resolution: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> List[dict]:
+        """Return the buckets of a sensor at a resolution."""
+        rollup = self._get_series(key)[resolution]
+        if end is None:
+            end = time()
+        if start is None:
+            start = end - rollup.seconds * rollup.size
+        return rollup.query(start, end)
+
+    def _get_series(self, key: str) -> Dict[str, Rollup]:
+        series = self._series.get(key)
+        if series is None:
+            stored = self._stored.pop(key, {})
+            series = self._series[key] = {
+                name: Rollup(seconds, size, stored.get(name))
+                for name, (seconds, size) in RESOLUTIONS.items()
+            }
+        return series
+
+    def _data_to_save(self) -> dict:
+        # called when the store writes, readings from now on need a new save
+        self._save_pending = False
+        # series not seen since the start are kept as they were loaded
+        data = dict(self._stored)
+        for key, series in self._series.items():
+            data[key] = {name: rollup.as_dict() for name, rollup in series.items()}
+        return data
@@ -15,6 +15,7 @@ from homeassistant.const import CONF_NAME
 from homeassistant.core import HomeAssistant
 
 from . import DysonEntity
+from .command import atomic
 from .const import DATA_DEVICES, DOMAIN
 
 AVAILABLE_MODES = [MODE_NORMAL, MODE_AUTO]
@@ -70,8 +71,9 @@ class DysonHumidifierEntity(DysonEntity, HumidifierEntity):
 
     def set_humidity(self, humidity: int) -> None:
         """Set target humidity."""
-        self._device.set_target_humidity(humidity)
-        self.set_mode(MODE_NORMAL)
+        with atomic(self._device):
+            self._device.set_target_humidity(humidity)
+            self.set_mode(MODE_NORMAL)
 
     def set_mode(self, mode: str) -> None:
         """Set humidification mode."""
@@ -1,6 +1,7 @@
 """Sensor platform for dyson."""
 
-from typing import Callable, Union
+from datetime import datetime
+from typing import Callable, Optional, Union
 
 from libdyson import (
     Dyson360Eye,
@@ -11,6 +12,7 @@ from libdyson import (
     DysonPurifierHumidifyCoolFormaldehyde,
 )
 from libdyson.const import MessageType
+import voluptuous as vol
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
@@ -21,17 +23,33 @@ from homeassistant.const import (
     TEMP_CELSIUS,
     TIME_HOURS,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
+import homeassistant.util.dt as dt_util
 
 from . import DysonEntity
-from .const import DATA_COORDINATORS, DATA_DEVICES, DOMAIN
+from .const import DATA_COORDINATORS, DATA_DEVICES, DATA_HISTORY, DOMAIN
+from .history import RESOLUTIONS, AirQualityHistory
 from .utils import environmental_property
 
+ATTR_RESOLUTION = "resolution"
+ATTR_START = "start"
+ATTR_END = "end"
+
+SERVICE_GET_AIR_QUALITY_HISTORY = "get_air_quality_history"
+
+GET_AIR_QUALITY_HISTORY_SCHEMA = {
+    vol.Optional(ATTR_RESOLUTION, default="hour"): vol.In(list(RESOLUTIONS)),
+    vol.Optional(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: Callable
@@ -79,6 +97,14 @@ async def async_setup_entry(
             entities.append(DysonHCHOSensor(coordinator, device, name))
     async_add_entities(entities)
 
+    platform = entity_platform.current_platform.get()
+    platform.async_register_entity_service(
+        SERVICE_GET_AIR_QUALITY_HISTORY,
+        GET_AIR_QUALITY_HISTORY_SCHEMA,
+        "async_get_air_quality_history",
+        supports_response=SupportsResponse.ONLY,
+    )
+
 
 class DysonSensor(SensorEntity, DysonEntity):
     """Base class for a Dyson sensor."""
@@ -86,11 +112,33 @@ class DysonSensor(SensorEntity, DysonEntity):
     _MESSAGE_TYPE = MessageType.STATE
     _SENSOR_TYPE = None
     _SENSOR_NAME = None
+    # keep downsampled history of the readings
+    _HISTORY = False
 
     def __init__(self, device: DysonDevice, name: str):
         """Initialize the sensor."""
         super().__init__(device, name)
 
+    async def async_get_air_quality_history(
+        self,
+        resolution: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> dict:
+        """Return the downsampled history of the sensor."""
+        if not self._HISTORY:
+            raise HomeAssistantError(f"{self.entity_id} keeps no air quality history")
+        history: AirQualityHistory = self.hass.data[DOMAIN][DATA_HISTORY]
+        return {
+            ATTR_RESOLUTION: resolution,
+            "buckets": history.async_query(
+                self.unique_id,
+                resolution,
+                None if start is None else dt_util.as_timestamp(start),
+                None if end is None else dt_util.as_timestamp(end),
+            ),
+        }
+
     @property
     def sub_name(self):
         """Return the name of the Dyson sensor."""
@@ -113,6 +161,46 @@ class DysonSensorEnvironmental(CoordinatorEntity, DysonSensor):
         """Initialize the environmental sensor."""
         CoordinatorEntity.__init__(self, coordinator)
         DysonSensor.__init__(self, device, name)
+        self._last_update_success = True
+
+    async def async_added_to_hass(self) -> None:
+        """Call when entity is added to hass."""
+        await super().async_added_to_hass()
+        if self._HISTORY:
+            self.async_on_remove(
+                self._dispatcher.async_add_listener(
+                    MessageType.ENVIRONMENTAL, self._async_record_reading
+                )
+            )
+
+    @callback
+    def _async_record_reading(self) -> None:
+        """Add the current reading to the history."""
+        try:
+            value = getattr(self._device, self._FIELDS[0])
+        except (KeyError, TypeError, ValueError):
+            return
+        # negative values stand for off, initializing or failed
+        if isinstance(value, (int, float)) and value >= 0:
+            self.hass.data[DOMAIN][DATA_HISTORY].async_add(self.unique_id, value)
+
+    @property
+    def available(self) -> bool:
+        """Return if polling succeeds and the device is connected."""
+        return CoordinatorEntity.available.fget(self) and DysonSensor.available.fget(
+            self
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when a poll changes availability.
+
+        Readings arrive later as environmental messages, see DysonDispatcher.
+        """
+        if self.coordinator.last_update_success == self._last_update_success:
+            return
+        self._last_update_success = self.coordinator.last_update_success
+        self.async_write_ha_state()
 
 
 class DysonBatterySensor(DysonSensor):
@@ -120,6 +208,7 @@ class DysonBatterySensor(DysonSensor):
 
     _SENSOR_TYPE = "battery_level"
     _SENSOR_NAME = "Battery Level"
+    _FIELDS = ("battery_level",)
     _attr_device_class = SensorDeviceClass.BATTERY
     _attr_native_unit_of_measurement = PERCENTAGE
 
@@ -134,6 +223,7 @@ class DysonFilterLifeSensor(DysonSensor):
 
     _SENSOR_TYPE = "filter_life"
     _SENSOR_NAME = "Filter Life"
+    _FIELDS = ("filter_life",)
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_icon = "mdi:filter-outline"
     _attr_native_unit_of_measurement = TIME_HOURS
@@ -149,6 +239,7 @@ class DysonCarbonFilterLifeSensor(DysonSensor):
 
     _SENSOR_TYPE = "carbon_filter_life"
     _SENSOR_NAME = "Carbon Filter Life"
+    _FIELDS = ("carbon_filter_life",)
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_icon = "mdi:filter-outline"
     _attr_native_unit_of_measurement = PERCENTAGE
@@ -164,6 +255,7 @@ class DysonHEPAFilterLifeSensor(DysonSensor):
 
     _SENSOR_TYPE = "hepa_filter_life"
     _SENSOR_NAME = "HEPA Filter Life"
+    _FIELDS = ("hepa_filter_life",)
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_icon = "mdi:filter-outline"
     _attr_native_unit_of_measurement = PERCENTAGE
@@ -179,6 +271,7 @@ class DysonCombinedFilterLifeSensor(DysonSensor):
 
     _SENSOR_TYPE = "combined_filter_life"
     _SENSOR_NAME = "Filter Life"
+    _FIELDS = ("hepa_filter_life",)
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_icon = "mdi:filter-outline"
     _attr_native_unit_of_measurement = PERCENTAGE
@@ -194,6 +287,7 @@ class DysonNextDeepCleanSensor(DysonSensor):
 
     _SENSOR_TYPE = "next_deep_clean"
     _SENSOR_NAME = "Next Deep Clean"
+    _FIELDS = ("time_until_next_clean",)
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_icon = "mdi:filter-outline"
     _attr_native_unit_of_measurement = TIME_HOURS
@@ -209,6 +303,7 @@ class DysonHumiditySensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "humidity"
     _SENSOR_NAME = "Humidity"
+    _FIELDS = ("humidity",)
     _attr_device_class = SensorDeviceClass.HUMIDITY
     _attr_native_unit_of_measurement = PERCENTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -224,6 +319,7 @@ class DysonTemperatureSensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "temperature"
     _SENSOR_NAME = "Temperature"
+    _FIELDS = ("temperature",)
     _attr_device_class = SensorDeviceClass.TEMPERATURE
     _attr_native_unit_of_measurement = TEMP_CELSIUS
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -253,6 +349,8 @@ class DysonPM25Sensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "pm25"
     _SENSOR_NAME = "PM 2.5"
+    _FIELDS = ("particulate_matter_2_5",)
+    _HISTORY = True
     _attr_device_class = SensorDeviceClass.PM25
     _attr_native_unit_of_measurement = CONCENTRATION_MICROGRAMS_PER_CUBIC_METER
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -268,6 +366,8 @@ class DysonPM10Sensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "pm10"
     _SENSOR_NAME = "PM 10"
+    _FIELDS = ("particulate_matter_10",)
+    _HISTORY = True
     _attr_device_class = SensorDeviceClass.PM10
     _attr_native_unit_of_measurement = CONCENTRATION_MICROGRAMS_PER_CUBIC_METER
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -283,6 +383,7 @@ class DysonParticulatesSensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "pm1"
     _SENSOR_NAME = "Particulates"
+    _FIELDS = ("particulates",)
     _attr_device_class = SensorDeviceClass.PM1
     _attr_native_unit_of_measurement = CONCENTRATION_MICROGRAMS_PER_CUBIC_METER
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -298,6 +399,8 @@ class DysonVOCSensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "voc"
     _SENSOR_NAME = "Volatile Organic Compounds"
+    _FIELDS = ("volatile_organic_compounds",)
+    _HISTORY = True
     _attr_device_class = SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS
     _attr_native_unit_of_measurement = CONCENTRATION_MICROGRAMS_PER_CUBIC_METER
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -313,6 +416,8 @@ class DysonNO2Sensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "no2"
     _SENSOR_NAME = "Nitrogen Dioxide"
+    _FIELDS = ("nitrogen_dioxide",)
+    _HISTORY = True
     _attr_device_class = SensorDeviceClass.NITROGEN_DIOXIDE
     _attr_native_unit_of_measurement = CONCENTRATION_MICROGRAMS_PER_CUBIC_METER
     _attr_state_class = SensorStateClass.MEASUREMENT
@@ -328,6 +433,8 @@ class DysonHCHOSensor(DysonSensorEnvironmental):
 
     _SENSOR_TYPE = "hcho"
     _SENSOR_NAME = "Formaldehyde"
+    _FIELDS = ("formaldehyde",)
+    _HISTORY = True
     _attr_device_class = SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS
     _attr_unit_of_measurement = CONCENTRATION_MICROGRAMS_PER_CUBIC_METER
 
@@ -0,0 +1,153 @@
+"""Connection health supervision for Dyson devices."""
+
+from datetime import timedelta
+import logging
+from time import monotonic
+from typing import Callable, Optional
+
+from libdyson import MessageType
+from libdyson.dyson_device import DysonDevice
+from libdyson.exceptions import DysonException
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .dispatcher import DysonDispatcher
+
+_LOGGER = logging.getLogger(__name__)
+
+# a device quiet for this long is asked for its state
+HEARTBEAT_INTERVAL = 60
+# a device quiet for this long is considered gone and reconnected
+HEARTBEAT_TIMEOUT = 3 * HEARTBEAT_INTERVAL
+
+
+class DysonSupervisor:
+    """Watch the MQTT session of a device and reconnect it when it dies.
+
+    Every message counts as a heartbeat. A device quiet for a minute is asked
+    for its current state, one still quiet after three minutes is marked
+    unavailable and handed back to the connection manager, which reconnects
+    it with backoff. paho does not always notice a half-open connection, so
+    is_connected alone can stay True for a dead session.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        device: DysonDevice,
+        dispatcher: DysonDispatcher,
+        reconnect: Callable[[], bool],
+    ) -> None:
+        """Initialize the supervisor."""
+        self._hass = hass
+        self._device = device
+        self._dispatcher = dispatcher
+        self._reconnect = reconnect
+        self._unsubs = []
+        self._timed_out = False
+        self._connected_at: Optional[float] = None
+        self.last_message_at = monotonic()
+        self.uptime = 0.0
+        self.sessions = 0
+        self.heartbeat_requests = 0
+        self.heartbeat_timeouts = 0
+        self.reconnects = 0
+
+    @property
+    def available(self) -> bool:
+        """Return if the device is connected and alive."""
+        return self._device.is_connected and not self._timed_out
+
+    @property
+    def statistics(self) -> dict:
+        """Return connection health statistics."""
+        uptime = self.uptime
+        if self._connected_at is not None:
+            uptime += monotonic() - self._connected_at
+        return {
+            "available": self.available,
+            "seconds_since_last_message": round(monotonic() - self.last_message_at, 1),
+            "uptime": round(uptime),
+            "current_session": None
+            if self._connected_at is None
+            else round(monotonic() - self._connected_at),
+            "sessions": self.sessions,
+            "heartbeat_requests": self.heartbeat_requests,
+            "heartbeat_timeouts": self.heartbeat_timeouts,
+            "reconnects": self.reconnects,
+        }
+
+    @callback
+    def async_start(self) -> None:
+        """Start supervising the device."""
+        for message_type in MessageType:
+            self._unsubs.append(
+                self._dispatcher.async_add_listener(message_type, self._async_message)
+            )
+        self._unsubs.append(
+            async_track_time_interval(
+                self._hass, self._async_check, timedelta(seconds=HEARTBEAT_INTERVAL)
+            )
+        )
+        self._async_track_connection()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop supervising the device."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    @callback
+    def _async_message(self) -> None:
+        # libdyson also reports connects and disconnects as state messages
+        self._async_track_connection()
+        if not self._device.is_connected:
+            return
+        self.last_message_at = monotonic()
+        if self._timed_out:
+            _LOGGER.info("Device %s is responding again", self._device.serial)
+            self._timed_out = False
+            self._dispatcher.async_write_all()
+
+    @callback
+    def _async_track_connection(self) -> None:
+        now = monotonic()
+        if self._device.is_connected and self._connected_at is None:
+            self._connected_at = now
+            self.sessions += 1
+            self.last_message_at = now
+        elif not self._device.is_connected and self._connected_at is not None:
+            self.uptime += now - self._connected_at
+            self._connected_at = None
+
+    async def _async_check(self, _now=None) -> None:
+        self._async_track_connection()
+        quiet = monotonic() - self.last_message_at
+        if quiet >= HEARTBEAT_TIMEOUT:
+            if not self._timed_out:
+                _LOGGER.warning(
+                    "No message from device %s for %d s, reconnecting",
+                    self._device.serial,
+                    quiet,
+                )
+                self._timed_out = True
+                self.heartbeat_timeouts += 1
+                self._dispatcher.async_write_all()
+            if self._reconnect():
+                self.reconnects += 1
+            # give the attempt a full timeout before trying again
+            self.last_message_at = monotonic()
+        elif quiet >= HEARTBEAT_INTERVAL and self._device.is_connected:
+            self.heartbeat_requests += 1
+            try:
+                await self._hass.async_add_executor_job(
+                    self._device.request_current_status
+                )
+            except DysonException as err:
+                _LOGGER.debug(
+                    "Failed to request state of device %s: %s",
+                    self._device.serial,
+                    err,
+                )
@@ -33,6 +33,7 @@ class DysonNightModeSwitchEntity(DysonEntity, SwitchEntity):
     """Dyson fan night mode switch."""
 
     _attr_entity_category = EntityCategory.CONFIG
+    _FIELDS = ("night_mode",)
 
     @property
     def sub_name(self):
@@ -67,6 +68,7 @@ class DysonContinuousMonitoringSwitchEntity(DysonEntity, SwitchEntity):
     """Dyson fan continuous monitoring."""
 
     _attr_entity_category = EntityCategory.CONFIG
+    _FIELDS = ("continuous_monitoring",)
 
     @property
     def sub_name(self):
@@ -102,6 +104,7 @@ class DysonFocusModeSwitchEntity(DysonEntity, SwitchEntity):
 
     _attr_entity_category = EntityCategory.CONFIG
     _attr_icon = "mdi:image-filter-center-focus"
+    _FIELDS = ("focus_mode",)
 
     @property
     def sub_name(self):
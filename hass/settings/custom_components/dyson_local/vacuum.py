@@ -161,11 +161,6 @@ class DysonVacuumEntity(DysonEntity, StateVacuumEntity):
         """Return the battery level of the vacuum cleaner."""
         return self._device.battery_level
 
-    @property
-    def available(self) -> bool:
-        """Return True if entity is available."""
-        return self._device.is_connected
-
     @property
     def supported_features(self) -> int:
         """Flag vacuum cleaner robot features that are supported."""
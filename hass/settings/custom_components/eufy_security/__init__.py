@@ -1,55 +1,152 @@
 import asyncio
 from datetime import timedelta
+import heapq
+from itertools import islice
 import logging
+from time import perf_counter
 
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import Config, HomeAssistant
+from homeassistant.core import Config, HomeAssistant, callback
 from homeassistant.helpers.event import async_track_time_interval
 
-from .const import CAPTCHA_CONFIG, COORDINATOR, DOMAIN, PLATFORMS, CaptchaConfig
+from .const import (
+    CAPTCHA_CONFIG,
+    COORDINATOR,
+    DEVICE_OWNERS,
+    DOMAIN,
+    HISTORY_QUERY_LIMIT,
+    HISTORY_SIZE,
+    PLATFORMS,
+    TRACE_FLUSH_INTERVAL,
+    CaptchaConfig,
+    EufyConfig,
+)
 from .coordinator import EufySecurityDataUpdateCoordinator
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+def get_coordinators(hass: HomeAssistant, host: str = None) -> list:
+    coordinators = []
+    domain_data = hass.data.get(DOMAIN, {})
+    for config_entry in hass.config_entries.async_entries(DOMAIN):
+        coordinator = domain_data.get(config_entry.entry_id, {}).get(COORDINATOR, None)
+        if coordinator is None:
+            continue
+        if host is not None and coordinator.config.host != host:
+            continue
+        coordinators.append(coordinator)
+    return coordinators
+
+
+def get_station_assignments(hass: HomeAssistant) -> dict:
+    # stations listed in the options of an entry, serial number to entry
+    assignments = {}
+    for config_entry in hass.config_entries.async_entries(DOMAIN):
+        for serial_number in EufyConfig(config_entry).stations:
+            assignments[serial_number] = config_entry.entry_id
+    return assignments
+
+
+@callback
+def async_reclaim_devices(hass: HomeAssistant) -> None:
+    # connections skipped devices served elsewhere, reload the ones whose
+    # devices lost their connection so they set them up
+    owners = hass.data[DOMAIN].get(DEVICE_OWNERS, {})
+    for coordinator in get_coordinators(hass):
+        released = [
+            serial_number
+            for serial_number in coordinator.foreign_serial_numbers
+            if serial_number not in owners
+        ]
+        if len(released) > 0:
+            _LOGGER.info(f"{DOMAIN} - {coordinator.config.host} takes over {released}")
+            hass.async_create_task(
+                hass.config_entries.async_reload(coordinator.entry_id)
+            )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/events",
+        vol.Optional("serial_number"): str,
+        vol.Optional("event"): str,
+        vol.Optional("since"): vol.Coerce(float),
+        vol.Optional("until"): vol.Coerce(float),
+        vol.Optional("limit", default=HISTORY_QUERY_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=HISTORY_SIZE)
+        ),
+    }
+)
+@callback
+def websocket_get_events(hass: HomeAssistant, connection, msg: dict):
+    """Return recent events, newest first, from every connected instance."""
+    results = [
+        coordinator.event_history.query(
+            msg.get("serial_number"),
+            msg.get("event"),
+            msg.get("since"),
+            msg.get("until"),
+            msg["limit"],
+        )
+        for coordinator in get_coordinators(hass)
+    ]
+    merged = heapq.merge(
+        *results, key=lambda event: event["timestamp"], reverse=True
+    )
+    connection.send_result(msg["id"], {"events": list(islice(merged, msg["limit"]))})
+
+
 async def async_setup(hass: HomeAssistant, config: Config):
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
 
     async def async_handle_send_message(call):
-        coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
         _LOGGER.debug(f"{DOMAIN} - send_message - call.data: {call.data}")
         message = call.data.get("message")
         _LOGGER.debug(f"{DOMAIN} - end_message - message: {message}")
-        await coordinator.async_send_message(message)
+        for coordinator in get_coordinators(hass, call.data.get("host")):
+            await coordinator.async_send_message(message)
 
     async def async_force_sync(call):
-        coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
-        await coordinator.async_refresh()
+        for coordinator in get_coordinators(hass):
+            await coordinator.async_refresh()
 
     async def async_driver_connect(call):
-        coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
-        await coordinator.async_driver_connect()
+        for coordinator in get_coordinators(hass):
+            await coordinator.async_driver_connect()
 
     hass.services.async_register(DOMAIN, "driver_connect", async_driver_connect)
     hass.services.async_register(DOMAIN, "force_sync", async_force_sync)
     hass.services.async_register(DOMAIN, "send_message", async_handle_send_message)
+    websocket_api.async_register_command(hass, websocket_get_events)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     if hass.data.get(DOMAIN) is None:
         hass.data.setdefault(DOMAIN, {})
-    captcha_config = hass.data[DOMAIN].get(CAPTCHA_CONFIG, CaptchaConfig())
-    coordinator = hass.data[DOMAIN].get(
-        COORDINATOR,
-        EufySecurityDataUpdateCoordinator(hass, config_entry, captcha_config),
-    )
-    hass.data[DOMAIN][COORDINATOR] = coordinator
-    hass.data[DOMAIN][CAPTCHA_CONFIG] = captcha_config
+    entry_data = hass.data[DOMAIN].setdefault(config_entry.entry_id, {})
+    captcha_config = entry_data.get(CAPTCHA_CONFIG, None) or CaptchaConfig()
+    coordinator = entry_data.get(
+        COORDINATOR, None
+    ) or EufySecurityDataUpdateCoordinator(hass, config_entry, captcha_config)
+    entry_data[COORDINATOR] = coordinator
+    entry_data[CAPTCHA_CONFIG] = captcha_config
 
     await coordinator.initialize()
+    previous_owners = coordinator.claim_devices(
+        hass.data[DOMAIN].setdefault(DEVICE_OWNERS, {}), get_station_assignments(hass)
+    )
+    for entry_id in previous_owners:
+        # drops the devices now assigned to this entry
+        if hass.data[DOMAIN].get(entry_id, {}).get(COORDINATOR, None) is not None:
+            hass.async_create_task(hass.config_entries.async_reload(entry_id))
     await coordinator.async_refresh()
+    coordinator.build_capability_index()
     for platform in PLATFORMS:
         coordinator.platforms.append(platform)
         hass.async_add_job(
@@ -57,17 +154,26 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
         )
 
     async def update(event_time_utc):
+        started = perf_counter()
         coordinator.async_set_updated_data(coordinator.data)
+        # timed into the traces of the messages whose states it writes
+        coordinator.tracer.finish_entity_write(started)
 
     coordinator.update_listener = async_track_time_interval(
         hass, update, timedelta(seconds=1)
     )
+    coordinator.poll_listener = async_track_time_interval(
+        hass, coordinator.async_poll_if_due, coordinator.poll_tick
+    )
+    coordinator.trace_listener = async_track_time_interval(
+        hass, coordinator.tracer.async_flush, timedelta(seconds=TRACE_FLUSH_INTERVAL)
+    )
     config_entry.add_update_listener(async_reload_entry)
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
-    coordinator = hass.data[DOMAIN][COORDINATOR]
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][COORDINATOR]
     unloaded = all(
         await asyncio.gather(
             *[
@@ -78,12 +184,22 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
         )
     )
     coordinator.update_listener()
+    coordinator.poll_listener()
+    coordinator.trace_listener()
+    await coordinator.tracer.async_flush()
     if unloaded:
-        hass.data[DOMAIN] = {}
+        coordinator.release_devices(hass.data[DOMAIN].get(DEVICE_OWNERS, {}))
+        hass.data[DOMAIN].pop(config_entry.entry_id)
+        if config_entry.disabled_by is not None:
+            async_reclaim_devices(hass)
 
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    async_reclaim_devices(hass)
+
+
 async def async_reload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
     await async_unload_entry(hass, config_entry)
     await async_setup_entry(hass, config_entry)
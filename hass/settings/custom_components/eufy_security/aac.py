@@ -0,0 +1,82 @@
+SAMPLE_RATES = (
+    96000,
+    88200,
+    64000,
+    48000,
+    44100,
+    32000,
+    24000,
+    22050,
+    16000,
+    12000,
+    11025,
+    8000,
+    7350,
+)
+SAMPLES_PER_FRAME = 1024
+
+
+class AacConfig:
+    """Stream parameters read from an ADTS header."""
+
+    __slots__ = ("object_type", "sample_rate_index", "channels")
+
+    def __init__(self, object_type: int, sample_rate_index: int, channels: int):
+        self.object_type: int = object_type
+        self.sample_rate_index: int = sample_rate_index
+        self.channels: int = channels
+
+    @property
+    def sample_rate(self) -> int:
+        return SAMPLE_RATES[self.sample_rate_index]
+
+    @property
+    def audio_specific_config(self) -> str:
+        value = (
+            (self.object_type << 11)
+            | (self.sample_rate_index << 7)
+            | (self.channels << 3)
+        )
+        return f"{value:04x}"
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, AacConfig)
+            and self.object_type == other.object_type
+            and self.sample_rate_index == other.sample_rate_index
+            and self.channels == other.channels
+        )
+
+
+def read_adts_config(data: bytes) -> AacConfig:
+    if len(data) < 7 or data[0] != 0xFF or data[1] & 0xF6 != 0xF0:
+        return None
+    sample_rate_index = (data[2] >> 2) & 0x0F
+    if sample_rate_index >= len(SAMPLE_RATES):
+        return None
+    return AacConfig(
+        ((data[2] >> 6) & 0x03) + 1,
+        sample_rate_index,
+        ((data[2] & 0x01) << 2) | (data[3] >> 6),
+    )
+
+
+def split_adts_frames(data: bytes) -> list:
+    """Raw AAC frames, as memoryviews without their ADTS headers."""
+    view = memoryview(data)
+    frames = []
+    offset = 0
+    while offset + 7 <= len(data):
+        if data[offset] != 0xFF or data[offset + 1] & 0xF0 != 0xF0:
+            break
+        header_length = 7 if data[offset + 1] & 0x01 else 9
+        frame_length = (
+            ((data[offset + 3] & 0x03) << 11)
+            | (data[offset + 4] << 3)
+            | (data[offset + 5] >> 5)
+        )
+        if frame_length <= header_length or offset + frame_length > len(data):
+            break
+        frames.append(view[offset + header_length : offset + frame_length])
+        offset = offset + frame_length
+    return frames
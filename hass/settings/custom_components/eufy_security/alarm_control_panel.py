@@ -73,7 +73,9 @@ ALARM_TRIGGER_SCHEMA = make_entity_service_schema({vol.Required("duration"): cv.
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
 ):
-    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
+    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ][COORDINATOR]
 
     entities = []
     for device in coordinator.stations.values():
@@ -21,146 +21,150 @@ from .entity import EufySecurityEntity
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+INSTRUMENTS = [
+    (
+        "global_motion_sensor",
+        "Global Motion Sensor",
+        "state.global_motion_sensor",
+        None,
+        DEVICE_CLASS_MOTION,
+        None,
+    ),
+    (
+        "motion_sensor",
+        "Motion Sensor",
+        "state.motionDetected",
+        None,
+        DEVICE_CLASS_MOTION,
+        None,
+    ),
+    (
+        "person_detector_sensor",
+        "Person Detector Sensor",
+        "state.personDetected",
+        None,
+        DEVICE_CLASS_MOTION,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "person_detection_enabled",
+        "Person Detection Enabled",
+        "state.personDetection",
+        None,
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "pet_detector_sensor",
+        "Pet Detector Sensor",
+        "state.petDetected",
+        None,
+        DEVICE_CLASS_MOTION,
+        None,
+    ),
+    (
+        "sound_detector_sensor",
+        "Sound Detector Sensor",
+        "state.soundDetected",
+        None,
+        DEVICE_CLASS_SOUND,
+        None,
+    ),
+    (
+        "crying_detector_sensor",
+        "Crying Detector Sensor",
+        "state.cryingDetected",
+        None,
+        None,
+        None,
+    ),
+    (
+        "sensor_open",
+        "Sensor Open",
+        "state.sensorOpen",
+        None,
+        DEVICE_CLASS_DOOR,
+        None,
+    ),
+    (
+        "battery_low",
+        "Battery Low",
+        "state.batteryLow",
+        None,
+        DEVICE_CLASS_BATTERY,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "ringing_sensor",
+        "Ringing Sensor",
+        "state.ringing",
+        "mdi:bell-ring",
+        None,
+        None,
+    ),
+    (
+        "notification_person_enabled",
+        "Notification for Person",
+        "state.notificationPerson",
+        "mdi:bell-ring",
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "notification_pet_enabled",
+        "Notification for Pet",
+        "state.notificationPet",
+        "mdi:bell-ring",
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "notification_all_other_motion_enabled",
+        "Notification for All Other Motion",
+        "state.notificationAllOtherMotion",
+        "mdi:bell-ring",
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "notification_crying_enabled",
+        "Notification for Crying",
+        "state.notificationCrying",
+        "mdi:bell-ring",
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "notification_all_sound_enabled",
+        "Notification for All Sound",
+        "state.notificationAllSound",
+        "mdi:bell-ring",
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "streaming",
+        "Streaming Sensor",
+        "is_streaming",
+        None,
+        DEVICE_CLASS_MOTION,
+        EntityCategory.DIAGNOSTIC,
+    ),
+]
+
+
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
 ):
-    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
-
-    INSTRUMENTS = [
-        (
-            "global_motion_sensor",
-            "Global Motion Sensor",
-            "state.global_motion_sensor",
-            None,
-            DEVICE_CLASS_MOTION,
-            None,
-        ),
-        (
-            "motion_sensor",
-            "Motion Sensor",
-            "state.motionDetected",
-            None,
-            DEVICE_CLASS_MOTION,
-            None,
-        ),
-        (
-            "person_detector_sensor",
-            "Person Detector Sensor",
-            "state.personDetected",
-            None,
-            DEVICE_CLASS_MOTION,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "person_detection_enabled",
-            "Person Detection Enabled",
-            "state.personDetection",
-            None,
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "pet_detector_sensor",
-            "Pet Detector Sensor",
-            "state.petDetected",
-            None,
-            DEVICE_CLASS_MOTION,
-            None,
-        ),
-        (
-            "sound_detector_sensor",
-            "Sound Detector Sensor",
-            "state.soundDetected",
-            None,
-            DEVICE_CLASS_SOUND,
-            None,
-        ),
-        (
-            "crying_detector_sensor",
-            "Crying Detector Sensor",
-            "state.cryingDetected",
-            None,
-            None,
-            None,
-        ),
-        (
-            "sensor_open",
-            "Sensor Open",
-            "state.sensorOpen",
-            None,
-            DEVICE_CLASS_DOOR,
-            None,
-        ),
-        (
-            "battery_low",
-            "Battery Low",
-            "state.batteryLow",
-            None,
-            DEVICE_CLASS_BATTERY,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "ringing_sensor",
-            "Ringing Sensor",
-            "state.ringing",
-            "mdi:bell-ring",
-            None,
-            None,
-        ),
-        (
-            "notification_person_enabled",
-            "Notification for Person",
-            "state.notificationPerson",
-            "mdi:bell-ring",
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "notification_pet_enabled",
-            "Notification for Pet",
-            "state.notificationPet",
-            "mdi:bell-ring",
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "notification_all_other_motion_enabled",
-            "Notification for All Other Motion",
-            "state.notificationAllOtherMotion",
-            "mdi:bell-ring",
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "notification_crying_enabled",
-            "Notification for Crying",
-            "state.notificationCrying",
-            "mdi:bell-ring",
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "notification_all_sound_enabled",
-            "Notification for All Sound",
-            "state.notificationAllSound",
-            "mdi:bell-ring",
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "streaming",
-            "Streaming Sensor",
-            "is_streaming",
-            None,
-            DEVICE_CLASS_MOTION,
-            EntityCategory.DIAGNOSTIC,
-        ),
-    ]
+    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ][COORDINATOR]
 
     entities = []
     for device in coordinator.devices.values():
+        capabilities = coordinator.capabilities[device.serial_number]
         for id, description, key, icon, device_class, entity_category in INSTRUMENTS:
-            if not get_child_value(device.__dict__, key) is None:
+            if key in capabilities:
                 entities.append(
                     EufySecurityBinarySensor(
                         coordinator,
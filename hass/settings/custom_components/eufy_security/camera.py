@@ -1,11 +1,12 @@
 from aiohttp import web
 import aiohttp
 import asyncio
+from collections import deque
 import logging
 from contextlib import suppress
+from queue import Empty
 import threading
-from time import sleep
-import socket
+from time import monotonic, sleep
 import traceback
 
 from haffmpeg.camera import CameraMjpeg
@@ -33,9 +34,25 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.config_validation import make_entity_service_schema
 from homeassistant.helpers.event import async_call_later
 
-from .const import COORDINATOR, DEFAULT_CODEC, DOMAIN, NAME, Device, wait_for_value
+from .const import (
+    AUDIO_PROBE_FRAMES,
+    COORDINATOR,
+    DEFAULT_CODEC,
+    DOMAIN,
+    NAME,
+    SNAPSHOT_DECODE_TIMEOUT,
+    STREAM_AUDIO,
+    STREAM_VIDEO,
+    STREAM_START_SAMPLES,
+    STREAM_START_TIMEOUT,
+    WARM_START_EVENT_NAMES,
+    Device,
+)
 from .coordinator import EufySecurityDataUpdateCoordinator
 from .entity import EufySecurityEntity
+from .aac import AacConfig, read_adts_config
+from .publisher import RtspError, RtspPublisher
+from .relay import StreamRelay, get_stream_relay
 
 STATE_IDLE = "Idle"
 STATE_STREAMING = "Streaming"
@@ -51,12 +68,12 @@ FFMPEG_COMMAND = [
     "-analyzeduration",
     "{analyze_duration}",
     "-protocol_whitelist",
-    "pipe,file,tcp",
+    "pipe,file,tcp,http",
     "-f",
     "{video_codec}",
     "-i",
     # "-",
-    "tcp://localhost:{port}",
+    "{input}",
     "-vcodec",
     "copy",
     "-protocol_whitelist",
@@ -85,10 +102,20 @@ QUICK_RESPONSE_SCHEMA = make_entity_service_schema(
 )
 
 
+def percentile_95(durations) -> float:
+    if len(durations) == 0:
+        return None
+    durations = sorted(durations)
+    index = min(len(durations) - 1, int(round(0.95 * (len(durations) - 1))))
+    return round(durations[index], 3)
+
+
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
 ):
-    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
+    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ][COORDINATOR]
 
     entities = []
     for device in coordinator.devices.values():
@@ -161,6 +188,8 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
         self.picture_bytes = None
         self.picture_url = None
         self.no_picture_counter = 0
+        self.keyframe_image_key = None
+        self.keyframe_image: bytes = None
 
         # p2p streaming
         self.start_stream_function = self.async_start_p2p_livestream
@@ -175,16 +204,42 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
         self.default_codec = DEFAULT_CODEC
         self.is_ffmpeg_running = False
 
+        # time between stream request and camera reporting stream started
+        self.stream_start_durations: deque = deque(maxlen=STREAM_START_SAMPLES)
+        # time between stream_source and the first P2P frame of a cold start
+        self.first_frame_durations: deque = deque(maxlen=STREAM_START_SAMPLES)
+        # time between a watched warm start and its first P2P frame
+        self.warm_first_frame_durations: deque = deque(maxlen=STREAM_START_SAMPLES)
+        # time a viewer of a warm start still waited for the first P2P frame
+        self.warm_wait_durations: deque = deque(maxlen=STREAM_START_SAMPLES)
+
+        # warm start, stream on motion or ringing so a viewer finds it running
+        self.warm_started_at: float = None
+        self.warm_stop_listener = None
+        self.warm_start_hits: int = 0
+        self.warm_start_misses: int = 0
+        if self.device.serial_number in self.coordinator.config.warm_start_cameras:
+            self.device.set_event_callback(self.handle_device_event)
+
         # when HA started, p2p streaming was active, catch up with p2p streaming
         if self.device.is_p2p_streaming is True:
             async_call_later(self.coordinator.hass, 0, self.async_start_p2p_livestream)
 
         self.p2p_url = f"rtsp://{self.coordinator.config.rtsp_server_address}:{self.coordinator.config.rtsp_server_port}/{self.device.serial_number}"
-        self.p2p_port = 0
-        self.p2p_thread = threading.Thread(
-            target=self.handle_queue_threaded, daemon=True
-        )
-        self.p2p_thread.start()
+        self.p2p_publisher: RtspPublisher = None
+        self.p2p_audio_config: AacConfig = None
+        self.p2p_relay: StreamRelay = None
+        self.p2p_input: str = None
+        if self.coordinator.config.native_p2p_publisher is True:
+            self.p2p_thread = threading.Thread(
+                target=self.handle_queue_native, daemon=True
+            )
+            self.p2p_thread.start()
+        else:
+            # ffmpeg pulls the raw video from the relay shared by all cameras
+            self.p2p_relay = get_stream_relay(self.coordinator.hass)
+            self.p2p_input = self.p2p_relay.register(self.device)
+            self.device.set_codec_callback(self.codec_changed)
         self.ffmpeg_output = f"-f rtsp -rtsp_transport tcp {self.p2p_url}"
 
         # for rtsp streaming
@@ -194,54 +249,92 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
 
         self.set_is_streaming()
 
-    def handle_queue_threaded(self):
-        codec_checked = False
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        self.device.set_event_callback(None)
+        self.cancel_warm_stop()
+        if self.p2p_relay is not None:
+            self.device.set_codec_callback(None)
+            self.p2p_relay.unregister(self.device)
+
+    def codec_changed(self):
+        # ffmpeg was told the codec up front, restart it with the new one
+        _LOGGER.debug("%s %s - codec_changed - %s", DOMAIN, self.name, self.device.codec)
+        self.default_codec = self.device.codec
+        if self.ffmpeg.is_running is True:
+            self.stop_ffmpeg()
+            async_call_later(self.coordinator.hass, 0, self.start_ffmpeg)
+
+    def handle_queue_native(self):
+        pending = []
+        while True:
             try:
-                _LOGGER.debug("start socket for tcp")
-                sock.bind(("localhost", 0))
-                self.p2p_port = sock.getsockname()[1]
-            except Exception as err:
-                _LOGGER.error("Unable to connect to host: %s", err)
-                return
+                kind, received_at, data = self.device.queue.get(timeout=1)
+            except Empty:
+                if self.device.is_streaming is not True:
+                    pending.clear()
+                    self.close_publisher()
+                continue
+            if self.device.is_streaming is not True:
+                pending.clear()
+                self.close_publisher()
+                continue
 
-            while True:
-                sock.listen()
-                client_socket, client_address = sock.accept()
-                _LOGGER.debug("client connected")
-
-                with client_socket:
-                    while self.device.is_streaming is True:
-                        while not self.device.queue.empty():
-                            if (
-                                codec_checked is False
-                                and self.device.codec != self.default_codec
-                            ):
-                                self.default_codec = self.device.codec
-                                self.stop_ffmpeg()
-                                async_call_later(
-                                    self.coordinator.hass, 0, self.start_ffmpeg
-                                )
-                                codec_checked = True
-                                _LOGGER.debug(
-                                    f"{DOMAIN} {self.name} - handle_queue_threaded - fix codec"
-                                )
-                                sleep(2)
-                                break
-
-                            try:
-                                client_socket.sendall(
-                                    bytearray(self.device.queue.get()["data"])
-                                )
-                            except OSError as err:
-                                _LOGGER.error("Unable to send payload : %s", err)
-
-                        sleep(0.1)
-                client_socket.close()
-            sock.close()
-            _LOGGER.debug(
-                f"{DOMAIN} {self.name} - handle_queue_threaded - finish - {self.device.queue.qsize()} - {self.ffmpeg.is_running} - {self.device.is_streaming}"
+            try:
+                if kind == STREAM_AUDIO:
+                    self.publish_audio(data, received_at)
+                else:
+                    pending.append((data, received_at))
+                    self.publish_video(pending)
+            except (OSError, RtspError) as err:
+                _LOGGER.error(
+                    "%s %s - handle_queue_native - unable to publish: %s",
+                    DOMAIN,
+                    self.name,
+                    err,
+                )
+                pending.clear()
+                self.close_publisher()
+                sleep(1)
+
+    def publish_audio(self, data: bytes, received_at: float):
+        config = read_adts_config(data)
+        if config is None:
+            return
+        self.p2p_audio_config = config
+        if self.p2p_publisher is not None and self.p2p_publisher.audio == config:
+            self.p2p_publisher.send_audio(data, received_at)
+
+    def publish_video(self, pending: list):
+        if (
+            self.p2p_publisher is not None
+            and self.p2p_publisher.codec != self.device.codec
+        ):
+            self.close_publisher()
+        if self.p2p_publisher is None:
+            # hold video back briefly so an audio track can be announced too
+            if self.p2p_audio_config is None and len(pending) < AUDIO_PROBE_FRAMES:
+                return
+            publisher = RtspPublisher(
+                self.p2p_url, self.device.codec, self.p2p_audio_config
             )
+            publisher.connect()
+            self.p2p_publisher = publisher
+        for data, received_at in pending:
+            self.p2p_publisher.send_frame(data, received_at)
+        pending.clear()
+
+    def close_publisher(self):
+        if self.p2p_publisher is None:
+            return
+        _LOGGER.debug(
+            "%s %s - close_publisher - %s",
+            DOMAIN,
+            self.name,
+            self.p2p_publisher.statistics,
+        )
+        self.p2p_publisher.close()
+        self.p2p_publisher = None
 
     async def start_ffmpeg(self, executed_at=None):
         _LOGGER.debug(
@@ -253,9 +346,7 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
         ffmpeg_command_instance[input_index - 5] = str(
             int(self.coordinator.config.ffmpeg_analyze_duration) * 1000000
         )
-        ffmpeg_command_instance[input_index + 1] = ffmpeg_command_instance[
-            input_index + 1
-        ].replace("{port}", str(self.p2p_port))
+        ffmpeg_command_instance[input_index + 1] = self.p2p_input
         _LOGGER.debug(
             f"{DOMAIN} {self.name} - start_ffmpeg 2 - ffmpeg_command_instance {ffmpeg_command_instance}"
         )
@@ -290,8 +381,14 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
 
     def start_p2p(self):
         _LOGGER.debug(f"{DOMAIN} {self.name} - start_p2p - 1")
+        self.device.first_frame_at = None
         self.device.queue.queue.clear()
+        self.device.keyframe.clear()
+        self.p2p_audio_config = None
         self.empty_queue_counter = 0
+        if self.coordinator.config.native_p2p_publisher is True:
+            # handle_queue_native publishes the frames itself
+            return
         if self.ffmpeg.is_running is True:
             _LOGGER.debug(
                 f"{DOMAIN} {self.name} - start_p2p - ffmeg - running - stop it"
@@ -303,6 +400,7 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
 
     def stop_p2p(self):
         self.device.queue.queue.clear()
+        self.device.keyframe.clear()
         if self.stream is not None:
             self.stream.stop()
             self.stream = None
@@ -364,23 +462,124 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
         self._attr_is_streaming = self.device.is_streaming
 
     async def initiate_turn_on(self):
-        await self.coordinator.hass.async_add_executor_job(self.turn_on)
-        await wait_for_value(self.device.__dict__, "is_streaming", False, interval=0.5)
+        started_at = monotonic()
+        await self.start_stream_function()
+        if (
+            await self.device.store.wait_for_value(
+                "is_streaming", False, STREAM_START_TIMEOUT
+            )
+            is False
+        ):
+            _LOGGER.debug(f"{DOMAIN} {self.name} - initiate_turn_on - timed out")
+            return
+        self.stream_start_durations.append(monotonic() - started_at)
+
+    def handle_device_event(self, property_name: str, value):
+        if property_name not in WARM_START_EVENT_NAMES or not value:
+            return
+        if self.warm_started_at is not None:
+            # still unwatched, activity keeps it running a while longer
+            self.schedule_warm_stop()
+            return
+        if self.device.is_streaming is True:
+            return
+        _LOGGER.debug("%s %s - warm start - %s", DOMAIN, self.name, property_name)
+        self.warm_started_at = monotonic()
+        self.schedule_warm_stop()
+        self.coordinator.hass.async_create_task(self.start_stream_function(warm=True))
+
+    def schedule_warm_stop(self):
+        self.cancel_warm_stop()
+        self.warm_stop_listener = async_call_later(
+            self.coordinator.hass,
+            self.coordinator.config.warm_start_idle_timeout,
+            self.async_warm_stop,
+        )
+
+    def cancel_warm_stop(self):
+        if self.warm_stop_listener is not None:
+            self.warm_stop_listener()
+            self.warm_stop_listener = None
+
+    async def async_warm_stop(self, executed_at=None):
+        self.warm_stop_listener = None
+        if self.warm_started_at is None:
+            return
+        _LOGGER.debug("%s %s - warm start - not watched, stop", DOMAIN, self.name)
+        self.warm_started_at = None
+        self.warm_start_misses = self.warm_start_misses + 1
+        if self.device.is_streaming is True:
+            await self.stop_stream_function()
+
+    def claim_warm_start(self) -> float:
+        # returns when the warm start taken over began, None without one
+        warm_started_at = self.warm_started_at
+        if warm_started_at is None:
+            return None
+        # a viewer showed up, or started the stream by hand, it is theirs now
+        self.cancel_warm_stop()
+        self.warm_started_at = None
+        self.warm_start_hits = self.warm_start_hits + 1
+        return warm_started_at
+
+    async def record_first_frame(self, requested_at: float, warm_started_at: float):
+        if self.device.stream_source_type != STREAMING_SOURCE_P2P:
+            return
+        await self.device.store.wait_for_value(
+            "first_frame_at", None, STREAM_START_TIMEOUT
+        )
+        first_frame_at = self.device.first_frame_at
+        if first_frame_at is None:
+            return
+        if warm_started_at is None:
+            self.first_frame_durations.append(max(first_frame_at - requested_at, 0))
+            return
+        # the frame often came before the viewer, so the warm start is timed
+        # from its own start and the viewer's wait is kept apart
+        self.warm_first_frame_durations.append(max(first_frame_at - warm_started_at, 0))
+        self.warm_wait_durations.append(max(first_frame_at - requested_at, 0))
+
+    @property
+    def stream_start_p95(self):
+        return percentile_95(self.stream_start_durations)
+
+    @property
+    def warm_start_hit_rate(self):
+        total = self.warm_start_hits + self.warm_start_misses
+        if total == 0:
+            return None
+        return round(self.warm_start_hits / total, 3)
 
     async def stream_source(self):
+        requested_at = monotonic()
+        warm_started_at = self.claim_warm_start()
+        warm = warm_started_at is not None
+        cold = False
         if self.device.is_streaming is False:
             _LOGGER.debug(
                 f"{DOMAIN} {self.name} - stream_source - start - {self.device.is_streaming}"
             )
-            if self.coordinator.config.auto_start_stream is False:
-                return None
-            await self.initiate_turn_on()
+            if warm is True:
+                # the warm start is on its way already, do not ask twice
+                await self.device.store.wait_for_value(
+                    "is_streaming", False, STREAM_START_TIMEOUT
+                )
+            else:
+                if self.coordinator.config.auto_start_stream is False:
+                    return None
+                cold = True
+                await self.initiate_turn_on()
             _LOGGER.debug(f"{DOMAIN} {self.name} - stream_source - initiate finished")
         _LOGGER.debug(
             f"{DOMAIN} {self.name} - stream_source - address - {self.device.stream_source_address}"
         )
         if self.device.is_streaming is False:
             return None
+        if warm is True or cold is True:
+            # measured in the background, it must not delay the stream it measures
+            self.coordinator.hass.async_create_task(
+                self.record_first_frame(requested_at, warm_started_at)
+            )
         return self.device.stream_source_address
 
     def camera_image(self, width=None, height=None) -> bytes:
@@ -391,12 +590,16 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
     async def async_camera_image(self, width=None, height=None) -> bytes:
         # if streaming is active, do not overwrite live image
         if self.device.is_streaming is True:
-            size_command = None
-            if width and height:
-                size_command = f"-s {width}x{height}"
-            image_frame_bytes = await ImageFrame(self.ffmpeg_binary).get_image(
-                self.device.stream_source_address, extra_cmd=size_command
-            )
+            image_frame_bytes = None
+            if self.device.stream_source_type == STREAMING_SOURCE_P2P:
+                image_frame_bytes = await self.async_keyframe_image(width, height)
+            if image_frame_bytes is None:
+                size_command = None
+                if width and height:
+                    size_command = f"-s {width}x{height}"
+                image_frame_bytes = await ImageFrame(self.ffmpeg_binary).get_image(
+                    self.device.stream_source_address, extra_cmd=size_command
+                )
             if (image_frame_bytes is not None) and len(image_frame_bytes) > 0:
                 _LOGGER.debug(
                     f"{DOMAIN} {self.name} - camera_image len - {len(image_frame_bytes)}"
@@ -429,6 +632,45 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
                         )
         return self.picture_bytes
 
+    async def async_keyframe_image(self, width=None, height=None) -> bytes:
+        # decode the cached keyframe instead of reading back the RTSP output
+        keyframe = self.device.keyframe
+        if keyframe.access_unit is None:
+            return None
+        image_key = (keyframe.sequence, width, height)
+        if image_key == self.keyframe_image_key:
+            return self.keyframe_image
+
+        command = [self.ffmpeg_binary, "-hide_banner", "-loglevel", "error"]
+        command = command + ["-f", keyframe.codec, "-i", "pipe:0", "-frames:v", "1"]
+        if width and height:
+            command = command + ["-s", f"{width}x{height}"]
+        command = command + ["-f", "image2", "-c:v", "mjpeg", "pipe:1"]
+
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            async with async_timeout.timeout(SNAPSHOT_DECODE_TIMEOUT):
+                image, _ = await process.communicate(keyframe.access_unit)
+        except (OSError, asyncio.TimeoutError) as ex:
+            if process is not None and process.returncode is None:
+                process.kill()
+            _LOGGER.debug(
+                "%s %s - async_keyframe_image - failed - %s", DOMAIN, self.name, ex
+            )
+            return None
+
+        if process.returncode != 0 or len(image) == 0:
+            return None
+        self.keyframe_image_key = image_key
+        self.keyframe_image = image
+        return image
+
     async def handle_async_mjpeg_stream(self, request):
         stream = CameraMjpeg(self.ffmpeg_binary)
         await stream.open_camera(await self.stream_source())
@@ -473,7 +715,10 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
             return False
         return True
 
-    async def async_start_p2p_livestream(self, executed_at=None) -> None:
+    async def async_start_p2p_livestream(self, executed_at=None, warm=False) -> None:
+        if warm is False:
+            # started by hand or for a viewer, the warm stop must leave it running
+            self.claim_warm_start()
         await self.coordinator.async_set_p2p_livestream(
             self.device.serial_number, "start"
         )
@@ -483,7 +728,10 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
             self.device.serial_number, "stop"
         )
 
-    async def async_start_rtsp_livestream(self, executed_at=None) -> None:
+    async def async_start_rtsp_livestream(self, executed_at=None, warm=False) -> None:
+        if warm is False:
+            # started by hand or for a viewer, the warm stop must leave it running
+            self.claim_warm_start()
         if (
             await self.check_and_notify_rtsp_supported() is True
             and await self.check_and_notify_rtsp_enabled()
@@ -561,6 +809,14 @@ class EufySecurityCamera(Camera, EufySecurityEntity):
             "codec": self.device.codec,
             "is_rtsp_streaming": self.device.is_rtsp_streaming,
             "is_p2p_streaming": self.device.is_p2p_streaming,
+            "stream_start_p95": self.stream_start_p95,
+            "stream_start_samples": len(self.stream_start_durations),
+            "first_frame_p95": percentile_95(self.first_frame_durations),
+            "warm_first_frame_p95": percentile_95(self.warm_first_frame_durations),
+            "warm_wait_p95": percentile_95(self.warm_wait_durations),
+            "warm_start_hits": self.warm_start_hits,
+            "warm_start_misses": self.warm_start_misses,
+            "warm_start_hit_rate": self.warm_start_hit_rate,
         }
         if self.device.voices:
             custom_attributes["voices"] = self.device.voices
@@ -0,0 +1,52 @@
+"""JSON codec for the eufy-security-ws connection.
+
+orjson is used when it is installed, the standard library decoder and
+encoder otherwise.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    CODEC_NAME = "orjson"
+    loads = orjson.loads
+
+    def dumps(value) -> str:
+        return orjson.dumps(value).decode("utf-8")
+
+else:
+    CODEC_NAME = "json"
+    loads = json.loads
+
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class CommandTemplate:
+    """Outbound command whose constant fields are encoded once.
+
+    render() only encodes the variable fields and splices them between the
+    pre-encoded fragments.
+    """
+
+    def __init__(self, template: dict, fields: tuple = ()) -> None:
+        static = {key: value for key, value in template.items() if key not in fields}
+        self.fields: tuple = fields
+        self.defaults: dict = {field: template.get(field) for field in fields}
+
+        self._prefix: str = dumps(static)[:-1]
+        self._fragments: list = []
+        separator = "," if len(static) > 0 else ""
+        for field in fields:
+            self._fragments.append(separator + dumps(field) + ":")
+            separator = ","
+
+    def render(self, **values) -> str:
+        parts = [self._prefix]
+        for field, fragment in zip(self.fields, self._fragments):
+            parts.append(fragment)
+            parts.append(dumps(values.get(field, self.defaults[field])))
+        parts.append("}")
+        return "".join(parts)
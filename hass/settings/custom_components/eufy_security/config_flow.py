@@ -24,6 +24,11 @@ from .const import (
     CONF_SYNC_INTERVAL,
     CONF_USE_RTSP_SERVER_ADDON,
     CONF_GENERATE_FFMPEG_LOGS,
+    CONF_TRACE_SAMPLE_RATE,
+    CONF_NATIVE_P2P_PUBLISHER,
+    CONF_WARM_START_CAMERAS,
+    CONF_WARM_START_IDLE_TIMEOUT,
+    CONF_STATIONS,
     COORDINATOR,
     DEFAULT_AUTO_START_STREAM,
     DEFAULT_FFMPEG_ANALYZE_DURATION,
@@ -38,6 +43,11 @@ from .const import (
     DEFAULT_SYNC_INTERVAL,
     DEFAULT_USE_RTSP_SERVER_ADDON,
     DEFAULT_GENERATE_FFMPEG_LOGS,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    DEFAULT_NATIVE_P2P_PUBLISHER,
+    DEFAULT_WARM_START_CAMERAS,
+    DEFAULT_WARM_START_IDLE_TIMEOUT,
+    DEFAULT_STATIONS,
     DOMAIN,
 )
 from .coordinator import EufySecurityDataUpdateCoordinator
@@ -124,6 +134,37 @@ class EufySecurityOptionFlowHandler(config_entries.OptionsFlow):
                         CONF_GENERATE_FFMPEG_LOGS, DEFAULT_GENERATE_FFMPEG_LOGS
                     ),
                 ): bool,
+                vol.Optional(
+                    CONF_TRACE_SAMPLE_RATE,
+    CONF_NATIVE_P2P_PUBLISHER,
+                    default=self.config_entry.options.get(
+                        CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+                vol.Optional(
+                    CONF_NATIVE_P2P_PUBLISHER,
+                    default=self.config_entry.options.get(
+                        CONF_NATIVE_P2P_PUBLISHER, DEFAULT_NATIVE_P2P_PUBLISHER
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_WARM_START_CAMERAS,
+                    default=self.config_entry.options.get(
+                        CONF_WARM_START_CAMERAS, DEFAULT_WARM_START_CAMERAS
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_WARM_START_IDLE_TIMEOUT,
+                    default=self.config_entry.options.get(
+                        CONF_WARM_START_IDLE_TIMEOUT, DEFAULT_WARM_START_IDLE_TIMEOUT
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=600)),
+                vol.Optional(
+                    CONF_STATIONS,
+                    default=self.config_entry.options.get(
+                        CONF_STATIONS, DEFAULT_STATIONS
+                    ),
+                ): str,
             }
         )
 
@@ -155,15 +196,18 @@ class EufySecurityFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self._errors = {}
 
         if self.source == SOURCE_REAUTH:
-            self.coordinator = self.hass.data[DOMAIN][COORDINATOR]
+            self.coordinator = self.hass.data[DOMAIN][self.context["entry_id"]][
+                COORDINATOR
+            ]
             self.coordinator.captcha_config.set_input(user_input[CONF_CAPTCHA])
-            if self._async_current_entries():
-                await self.hass.config_entries.async_reload(self.context["entry_id"])
-
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
+            await self.hass.config_entries.async_reload(self.context["entry_id"])
+            return self.async_abort(reason="reauth_successful")
 
         if user_input is not None:
+            await self.async_set_unique_id(
+                f"{user_input[CONF_HOST]}:{user_input[CONF_PORT]}"
+            )
+            self._abort_if_unique_id_configured()
             valid = await self._test_credentials(
                 user_input[CONF_HOST], user_input[CONF_PORT]
             )
@@ -198,7 +242,7 @@ class EufySecurityFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             )
             await eufy_ws.connect()
             if not eufy_ws.ws.closed:
-                eufy_ws.ws.close()
+                await eufy_ws.ws.close()
             return True
         except Exception as ex:  # pylint: disable=broad-except
             _LOGGER.error(
@@ -210,7 +254,9 @@ class EufySecurityFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_reauth(self, user_input=None):
         _LOGGER.debug(f"{DOMAIN} async_step_reauth - {user_input}")
-        self.coordinator = self.hass.data[DOMAIN][COORDINATOR]
+        self.coordinator = self.hass.data[DOMAIN][self.context["entry_id"]][
+            COORDINATOR
+        ]
         return await self.async_step_reauth_confirm()
 
     async def async_step_reauth_confirm(self, user_input=None):
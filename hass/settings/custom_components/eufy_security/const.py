@@ -6,6 +6,8 @@ from queue import Queue
 
 from homeassistant.config_entries import ConfigEntry
 
+from .nal import KeyframeCache
+
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 # Base component constants
@@ -14,6 +16,8 @@ DOMAIN = "eufy_security"
 VERSION = "0.0.1"
 COORDINATOR = "coordinator"
 CAPTCHA_CONFIG = "captcha_config"
+DEVICE_OWNERS = "device_owners"
+RELAY = f"{DOMAIN}_relay"  # hass.data key, shared by every config entry
 
 # Platforms
 ALARM_CONTROL_PANEL = "alarm_control_panel"
@@ -41,6 +45,11 @@ CONF_NAME_FOR_CUSTOM1: str  = "name_for_custom1"
 CONF_NAME_FOR_CUSTOM2: str  = "name_for_custom2"
 CONF_NAME_FOR_CUSTOM3: str  = "name_for_custom3"
 CONF_GENERATE_FFMPEG_LOGS: str  = "generate_ffmpeg_logs"
+CONF_TRACE_SAMPLE_RATE: str = "trace_sample_rate"
+CONF_NATIVE_P2P_PUBLISHER: str = "native_p2p_publisher"
+CONF_WARM_START_CAMERAS: str = "warm_start_cameras"
+CONF_STATIONS: str = "stations"
+CONF_WARM_START_IDLE_TIMEOUT: str = "warm_start_idle_timeout"
 
 DEFAULT_HOST: str = "0.0.0.0"
 DEFAULT_PORT: int = 3000
@@ -56,7 +65,46 @@ DEFAULT_NAME_FOR_CUSTOM1: str = "Custom 1"
 DEFAULT_NAME_FOR_CUSTOM2: str = "Custom 2"
 DEFAULT_NAME_FOR_CUSTOM3: str = "Custom 3"
 DEFAULT_GENERATE_FFMPEG_LOGS: bool = False
-
+DEFAULT_TRACE_SAMPLE_RATE: float = 0  # share of messages traced, 0 to 1
+DEFAULT_NATIVE_P2P_PUBLISHER: bool = False
+DEFAULT_WARM_START_CAMERAS: str = ""  # comma separated serial numbers
+DEFAULT_STATIONS: str = ""  # comma separated serial numbers, empty serves any
+DEFAULT_WARM_START_IDLE_TIMEOUT: int = 60  # seconds
+
+# how long to wait for the add-on or camera to report back, in seconds
+DRIVER_CONNECT_TIMEOUT: float = 12.5
+CAPTCHA_TIMEOUT: float = 12.5
+START_LISTENING_TIMEOUT: float = 12.5
+PROPERTIES_TIMEOUT: float = 12.5
+STREAM_START_TIMEOUT: float = 25
+STREAM_START_SAMPLES: int = 50
+POLL_SCHEDULER_TICK: int = 10  # seconds
+POLL_MAX_BACKOFF: int = 8  # times sync interval
+SEND_QUEUE_SIZE: int = 256  # messages
+TRACE_BUFFER_SIZE: int = 5000  # traces kept until the next flush
+TRACE_FLUSH_INTERVAL: int = 10  # seconds
+TRACE_FILE_NAME: str = "eufy_security_trace_{entry_id}.jsonl"
+TRACE_FILE_MAX_SIZE: int = 10 * 1024 * 1024  # bytes, then rotated to .1
+TRACE_STREAM_SAMPLE_RATE: float = 0.01  # share of sampled stream frames kept
+P2P_PUBLISHER_TIMEOUT: float = 5  # seconds
+RELAY_BUFFER_LIMIT: int = 4 * 1024 * 1024  # bytes held for a slow ffmpeg
+SNAPSHOT_DECODE_TIMEOUT: float = 5  # seconds
+AUDIO_PROBE_FRAMES: int = 15  # video frames to wait for audio before publishing
+HISTORY_SIZE: int = 500  # events kept per device and event name
+HISTORY_QUERY_LIMIT: int = 100
+# events after which a warm start camera starts streaming before anyone asks
+WARM_START_EVENT_NAMES: set = {"motionDetected", "personDetected", "ringing"}
+HISTORY_EVENT_NAMES: set = {
+    "motionDetected",
+    "personDetected",
+    "petDetected",
+    "cryingDetected",
+    "soundDetected",
+    "ringing",
+    "sensorOpen",
+    "alarmEvent",
+    "alarmDelayEvent",
+}
 
 P2P_LIVESTREAMING_STATUS = "p2pLiveStreamingStatus"
 RTSP_LIVESTREAMING_STATUS = "rtspLiveStreamingStatus"
@@ -203,6 +251,11 @@ P2P_LIVESTREAM_STARTED = "livestream started"
 P2P_LIVESTREAM_STOPPED = "livestream stopped"
 RTSP_LIVESTREAM_STARTED = "rtsp livestream started"
 RTSP_LIVESTREAM_STOPPED = "rtsp livestream stopped"
+LIVESTREAM_VIDEO_DATA = "livestream video data"
+LIVESTREAM_AUDIO_DATA = "livestream audio data"
+# kinds of the (kind, received_at, data) items in Device.queue
+STREAM_VIDEO = "video"
+STREAM_AUDIO = "audio"
 EVENT_CONFIGURATION: dict = {
     "connected": {
         "name": "event",
@@ -249,11 +302,16 @@ EVENT_CONFIGURATION: dict = {
         "value": "event",
         "type": "state",
     },
-    "livestream video data": {
+    LIVESTREAM_VIDEO_DATA: {
         "name": "video_data",
         "value": "buffer",
         "type": "event",
     },
+    LIVESTREAM_AUDIO_DATA: {
+        "name": "audio_data",
+        "value": "buffer",
+        "type": "event",
+    },
     "alarm event": {
         "name": "alarmEvent",
         "value": "alarmEvent",
@@ -352,18 +410,64 @@ DEVICE_CATEGORY = {
 }
 
 
-async def wait_for_value(
-    ref_dict: dict, ref_key: str, value, max_counter: int = 50, interval=0.25
-):
-    _LOGGER.debug(f"{DOMAIN} - wait start - {ref_key}")
-    for counter in range(max_counter):
-        if ref_dict.get(ref_key, value) == value:
-            await asyncio.sleep(interval)
-        else:
-            _LOGGER.debug(f"{DOMAIN} - wait finish - {ref_key} - return True")
-            return True
-    _LOGGER.debug(f"{DOMAIN} - wait finish - {ref_key} - return False")
-    return False
+class ObservableStore:
+    """Key/value store that wakes up waiters as soon as a key changes.
+
+    Values live in the given dict, usually the owner's __dict__, so plain
+    attribute access and get_child_value lookups keep working. It is meant to
+    be used from the event loop only.
+    """
+
+    def __init__(self, values: dict = None) -> None:
+        self.values: dict = {} if values is None else values
+        self._waiters: dict = {}
+
+    def get(self, key: str, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key: str, value) -> None:
+        self.values[key] = value
+        for waiter in self._waiters.pop(key, []):
+            if not waiter.done():
+                waiter.set_result(value)
+
+    async def wait_for_value(self, key: str, value, timeout: float) -> bool:
+        """Wait until key holds anything but value, False if timeout passes first."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        _LOGGER.debug("%s - wait start - %s", DOMAIN, key)
+        while self.values.get(key, value) == value:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                _LOGGER.debug("%s - wait finish - %s - return False", DOMAIN, key)
+                return False
+            waiter = loop.create_future()
+            self._waiters.setdefault(key, []).append(waiter)
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                waiters = self._waiters.get(key, [])
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if len(waiters) == 0:
+                    self._waiters.pop(key, None)
+        _LOGGER.debug("%s - wait finish - %s - return True", DOMAIN, key)
+        return True
+
+
+class ObservableValue:
+    """Attribute descriptor publishing every assignment to the owner's store."""
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.__dict__.get(self.name)
+
+    def __set__(self, instance, value) -> None:
+        instance.store.set(self.name, value)
 
 
 def get_child_value(data, key, default_value=None):
@@ -380,7 +484,13 @@ def get_child_value(data, key, default_value=None):
 
 
 class Device:
+    properties = ObservableValue()
+    properties_metadata = ObservableValue()
+    is_streaming = ObservableValue()
+    first_frame_at = ObservableValue()
+
     def __init__(self, serial_number: str, state: dict) -> None:
+        self.store: ObservableStore = ObservableStore(self.__dict__)
         self.serial_number: str = serial_number
         self.state: dict = state
         self.name: str = state["name"]
@@ -404,8 +514,13 @@ class Device:
         self.stream_source_address: str = ""
         self.codec: str = DEFAULT_CODEC
         self.queue: Queue = Queue()
+        self.keyframe: KeyframeCache = KeyframeCache()
+        self.first_frame_at: float = None
 
         self.callback = None
+        self.codec_callback = None
+        self.event_callback = None
+        self.stream_listener = None
 
         self.set_global_motion_sensor()
 
@@ -466,16 +581,46 @@ class Device:
             codec = "h264"
         if codec == "h265":
             codec = "hevc"
+        if codec == self.codec:
+            return
         self.codec = codec
+        if self.codec_callback is not None:
+            self.codec_callback()
 
     def set_streaming_status_callback(self, callback):
         self.callback = callback
 
+    def set_codec_callback(self, callback):
+        self.codec_callback = callback
+
+    def set_event_callback(self, callback):
+        self.event_callback = callback
+
+    def set_stream_listener(self, listener):
+        self.stream_listener = listener
+
+    def push_stream_data(self, item: tuple):
+        if self.first_frame_at is None:
+            self.first_frame_at = item[1]
+        self.queue.put(item)
+        if self.stream_listener is not None:
+            self.stream_listener()
+
+    def get_capabilities(self) -> frozenset:
+        # top level keys and "state.<key>" keys that currently hold a value
+        keys = {key for key, value in self.__dict__.items() if value is not None}
+        keys.update(
+            f"state.{key}" for key, value in self.state.items() if value is not None
+        )
+        return frozenset(keys)
+
     def set_property(self, property_name, value):
         self.state[property_name] = value
         self.set_global_motion_sensor()
         if property_name in STREAMING_EVENT_NAMES:
             self.set_streaming_status()
+        if self.event_callback is not None:
+            self.event_callback(property_name, value)
 
     def set_global_motion_sensor(self):
         motion_detected = bool(get_child_value(self.state, "motionDetected"))
@@ -486,6 +631,14 @@ class Device:
         )
 
 
+def parse_serial_numbers(value: str) -> set:
+    return {
+        serial_number.strip()
+        for serial_number in value.split(",")
+        if serial_number.strip() != ""
+    }
+
+
 class EufyConfig:
     def __init__(self, config_entry: ConfigEntry) -> None:
         self.host: str = config_entry.data.get(CONF_HOST)
@@ -526,12 +679,31 @@ class EufyConfig:
         self.generate_ffmpeg_logs: bool = config_entry.options.get(
             CONF_GENERATE_FFMPEG_LOGS, DEFAULT_GENERATE_FFMPEG_LOGS
         )
+        self.trace_sample_rate: float = config_entry.options.get(
+            CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE
+        )
+        self.native_p2p_publisher: bool = config_entry.options.get(
+            CONF_NATIVE_P2P_PUBLISHER, DEFAULT_NATIVE_P2P_PUBLISHER
+        )
+        self.warm_start_cameras: set = parse_serial_numbers(
+            config_entry.options.get(CONF_WARM_START_CAMERAS, DEFAULT_WARM_START_CAMERAS)
+        )
+        self.warm_start_idle_timeout: int = config_entry.options.get(
+            CONF_WARM_START_IDLE_TIMEOUT, DEFAULT_WARM_START_IDLE_TIMEOUT
+        )
+        self.stations: set = parse_serial_numbers(
+            config_entry.options.get(CONF_STATIONS, DEFAULT_STATIONS)
+        )
 
         _LOGGER.debug(f"{DOMAIN} - config class initialized")
 
 
 class CaptchaConfig:
+    required = ObservableValue()
+    result = ObservableValue()
+
     def __init__(self):
+        self.store: ObservableStore = ObservableStore(self.__dict__)
         self.reset()
 
     def reset(self):
@@ -1,7 +1,7 @@
 import asyncio
 from datetime import timedelta
-import json
 import logging
+from time import monotonic
 
 import aiohttp
 
@@ -14,9 +14,14 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Upda
 from .const import (
     CAMERA_RESET_ALARM,
     CAMERA_TRIGGER_ALARM,
+    CAPTCHA_TIMEOUT,
     DOMAIN,
     DRIVER_CONNECT_MESSAGE,
+    DRIVER_CONNECT_TIMEOUT,
     EVENT_CONFIGURATION,
+    HISTORY_EVENT_NAMES,
+    HISTORY_SIZE,
+    LIVESTREAM_AUDIO_DATA,
     GET_DEVICE_PROPERTIES_MESSAGE,
     GET_DEVICE_PROPERTIES_METADATA_MESSAGE,
     GET_DEVICE_VOICES_MESSAGE,
@@ -29,6 +34,8 @@ from .const import (
     P2P_LIVESTREAM_STARTED,
     P2P_LIVESTREAMING_STATUS,
     POLL_REFRESH_MESSAGE,
+    POLL_SCHEDULER_TICK,
+    PROPERTIES_TIMEOUT,
     RTSP_LIVESTREAM_STARTED,
     RTSP_LIVESTREAMING_STATUS,
     QUICK_RESPONSE_MESSAGE,
@@ -42,35 +49,121 @@ from .const import (
     SET_RTSP_LIVESTREAM_MESSAGE,
     SET_RTSP_STREAM_MESSAGE,
     START_LISTENING_MESSAGE,
+    START_LISTENING_TIMEOUT,
+    TRACE_FILE_NAME,
+    TRACE_STREAM_SAMPLE_RATE,
     STATION_RESET_ALARM,
     STATION_TRIGGER_ALARM,
+    STREAM_AUDIO,
+    STREAM_VIDEO,
     STREAMING_EVENT_NAMES,
     CaptchaConfig,
     Device,
     EufyConfig,
+    ObservableStore,
+    ObservableValue,
     get_child_value,
-    wait_for_value,
 )
+from .codec import CommandTemplate, loads
+from .history import EventHistory
+from .scheduler import AdaptivePollScheduler
+from .tracing import Tracer
 from .websocket import EufySecurityWebSocket
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+SERIAL_NUMBER = ("serialNumber",)
+SET_API_SCHEMA_COMMAND = CommandTemplate(SET_API_SCHEMA)
+START_LISTENING_COMMAND = CommandTemplate(START_LISTENING_MESSAGE)
+DRIVER_CONNECT_COMMAND = CommandTemplate(DRIVER_CONNECT_MESSAGE)
+POLL_REFRESH_COMMAND = CommandTemplate(POLL_REFRESH_MESSAGE)
+GET_DEVICE_PROPERTIES_METADATA_COMMAND = CommandTemplate(
+    GET_DEVICE_PROPERTIES_METADATA_MESSAGE, SERIAL_NUMBER
+)
+GET_DEVICE_PROPERTIES_COMMAND = CommandTemplate(
+    GET_DEVICE_PROPERTIES_MESSAGE, SERIAL_NUMBER
+)
+GET_DEVICE_VOICES_COMMAND = CommandTemplate(GET_DEVICE_VOICES_MESSAGE, SERIAL_NUMBER)
+GET_STATION_PROPERTIES_METADATA_COMMAND = CommandTemplate(
+    GET_STATION_PROPERTIES_METADATA_MESSAGE, SERIAL_NUMBER
+)
+GET_STATION_PROPERTIES_COMMAND = CommandTemplate(
+    GET_STATION_PROPERTIES_MESSAGE, SERIAL_NUMBER
+)
+GET_RTSP_LIVESTREAM_STATUS_COMMAND = CommandTemplate(
+    GET_RTSP_LIVESTREAM_STATUS_MESSAGE, SERIAL_NUMBER
+)
+GET_P2P_LIVESTREAM_STATUS_COMMAND = CommandTemplate(
+    GET_P2P_LIVESTREAM_STATUS_MESSAGE, SERIAL_NUMBER
+)
+QUICK_RESPONSE_COMMAND = CommandTemplate(
+    QUICK_RESPONSE_MESSAGE, ("serialNumber", "voiceId")
+)
+SET_RTSP_STREAM_COMMAND = CommandTemplate(
+    SET_RTSP_STREAM_MESSAGE, ("serialNumber", "value")
+)
+SET_RTSP_LIVESTREAM_COMMANDS = {
+    state: CommandTemplate(
+        {
+            **SET_RTSP_LIVESTREAM_MESSAGE,
+            "command": SET_RTSP_LIVESTREAM_MESSAGE["command"].replace("{state}", state),
+        },
+        SERIAL_NUMBER,
+    )
+    for state in ("start", "stop")
+}
+SET_P2P_LIVESTREAM_COMMANDS = {
+    state: CommandTemplate(
+        {
+            **SET_P2P_LIVESTREAM_MESSAGE,
+            "command": SET_P2P_LIVESTREAM_MESSAGE["command"].replace("{state}", state),
+        },
+        SERIAL_NUMBER,
+    )
+    for state in ("start", "stop")
+}
+SET_DEVICE_STATE_COMMAND = CommandTemplate(
+    SET_DEVICE_STATE_MESSAGE, ("serialNumber", "value")
+)
+SET_GUARD_MODE_COMMAND = CommandTemplate(
+    SET_GUARD_MODE_MESSAGE, ("serialNumber", "mode")
+)
+STATION_TRIGGER_ALARM_COMMAND = CommandTemplate(
+    STATION_TRIGGER_ALARM, ("serialNumber", "seconds")
+)
+STATION_RESET_ALARM_COMMAND = CommandTemplate(STATION_RESET_ALARM, SERIAL_NUMBER)
+CAMERA_TRIGGER_ALARM_COMMAND = CommandTemplate(
+    CAMERA_TRIGGER_ALARM, ("serialNumber", "seconds")
+)
+CAMERA_RESET_ALARM_COMMAND = CommandTemplate(CAMERA_RESET_ALARM, SERIAL_NUMBER)
+SET_PROPERTY_COMMAND = CommandTemplate(
+    SET_PROPERTY_MESSAGE, ("serialNumber", "name", "value")
+)
+SET_LOCK_COMMAND = CommandTemplate(SET_LOCK_MESSAGE, ("serialNumber", "value"))
+SET_CAPTCHA_COMMAND = CommandTemplate(SET_CAPTCHA_MESSAGE, ("captchaId", "captcha"))
+
 
 class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
+    driver_connected = ObservableValue()
+    devices = ObservableValue()
+
     def __init__(
         self,
         hass: HomeAssistant,
         config_entry: ConfigEntry,
         captcha_config: CaptchaConfig,
     ) -> None:
+        self.entry_id: str = config_entry.entry_id
         self.config: EufyConfig = EufyConfig(config_entry)
         self.captcha_config: CaptchaConfig = captcha_config
+        # polling is driven by poll_scheduler, see async_poll_if_due
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=self.config.sync_interval),
+            update_interval=None,
         )
+        self.store: ObservableStore = ObservableStore(self.__dict__)
         self.ws = None
         self.session: aiohttp.ClientSession = aiohttp_client.async_get_clientsession(
             hass
@@ -80,7 +173,25 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
         self.driver_connected = None
         self.devices: dict = None
         self.stations: dict = None
+        self.foreign_serial_numbers: set = set()
+        self.capabilities: dict = {}
         self.update_listener = None
+        self.poll_listener = None
+        self.poll_scheduler: AdaptivePollScheduler = AdaptivePollScheduler(
+            self.config.sync_interval
+        )
+        self.poll_tick: timedelta = timedelta(
+            seconds=min(POLL_SCHEDULER_TICK, self.config.sync_interval)
+        )
+        self.tracer: Tracer = Tracer(
+            hass,
+            self.config.trace_sample_rate,
+            hass.config.path(TRACE_FILE_NAME.format(entry_id=self.entry_id)),
+        )
+        self.trace_listener = None
+        self.event_history: EventHistory = EventHistory(
+            HISTORY_EVENT_NAMES, HISTORY_SIZE
+        )
 
     async def initialize(self):
         await self.connect()
@@ -107,6 +218,7 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
             self.on_close,
             self.on_error,
         )
+        self.poll_scheduler.record_reconnect()
         try:
             await self.ws.connect()
         except Exception as ex:
@@ -128,7 +240,9 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
             return
 
         if (
-            await wait_for_value(self.captcha_config.__dict__, "required", False)
+            await self.captcha_config.store.wait_for_value(
+                "required", False, CAPTCHA_TIMEOUT
+            )
             is True
         ):
             _LOGGER.debug(
@@ -148,7 +262,9 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
             )
             self.captcha_config.set_input(None)
             if (
-                await wait_for_value(self.captcha_config.__dict__, "result", None)
+                await self.captcha_config.store.wait_for_value(
+                    "result", None, CAPTCHA_TIMEOUT
+                )
                 is True
             ):
                 if self.captcha_config.result is False:
@@ -156,7 +272,9 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
                     pass
                 else:
                     self.captcha_config.reset()
-                await wait_for_value(self.__dict__, "driver_connected", False)
+                await self.store.wait_for_value(
+                    "driver_connected", False, DRIVER_CONNECT_TIMEOUT
+                )
                 await self.check_if_captcha_required()
                 await asyncio.sleep(30)
                 await self.async_start_listening()
@@ -172,17 +290,62 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
                 "Start Listening was not completed in timely manner"
             )
 
+    def build_capability_index(self):
+        # built once before the platforms are set up, they share it for lookups
+        self.capabilities = {
+            serial_number: device.get_capabilities()
+            for serial_number, device in self.devices.items()
+        }
+
+    def claim_devices(self, owners: dict, assignments: dict) -> set:
+        """Keep only devices this connection serves, owners maps serial to entry.
+
+        A station listed in the options of an entry belongs to that entry, with
+        its devices, any other device to the first connection reporting it.
+        Returns the entries that served a device now assigned to this one.
+        """
+        entry_id = self.entry_id
+        previous_owners = set()
+        self.foreign_serial_numbers.clear()
+        for target_dict in [self.devices, self.stations]:
+            for serial_number, device in list(target_dict.items()):
+                station_serial_number = device.state.get("stationSerialNumber", serial_number)
+                assigned = assignments.get(serial_number, assignments.get(station_serial_number, None))
+                if assigned == entry_id:
+                    previous_owner = owners.get(serial_number, entry_id)
+                    if previous_owner != entry_id:
+                        previous_owners.add(previous_owner)
+                    owners[serial_number] = entry_id
+                    continue
+                if assigned is None and owners.setdefault(serial_number, entry_id) == entry_id:
+                    continue
+                _LOGGER.info(
+                    f"{DOMAIN} - {serial_number} is served by another connection, skipping it on {self.config.host}"
+                )
+                target_dict.pop(serial_number)
+                self.foreign_serial_numbers.add(serial_number)
+        return previous_owners
+
+    def release_devices(self, owners: dict):
+        entry_id = self.entry_id
+        for serial_number in [k for k, v in owners.items() if v == entry_id]:
+            owners.pop(serial_number)
+
     async def async_driver_connect(self):
-        await self.async_send_message(json.dumps(SET_API_SCHEMA))
-        await self.async_send_message(json.dumps(START_LISTENING_MESSAGE))
+        await self.async_send_message(SET_API_SCHEMA_COMMAND.render())
+        await self.async_send_message(START_LISTENING_COMMAND.render())
         self.driver_connected = None
-        await self.async_send_message(json.dumps(DRIVER_CONNECT_MESSAGE))
+        await self.async_send_message(DRIVER_CONNECT_COMMAND.render())
         # check if driver_connected response had received independent of result, could be True or False
-        return await wait_for_value(self.__dict__, "driver_connected", None)
+        return await self.store.wait_for_value(
+            "driver_connected", None, DRIVER_CONNECT_TIMEOUT
+        )
 
     async def async_start_listening(self):
-        await self.async_send_message(json.dumps(START_LISTENING_MESSAGE))
-        return await wait_for_value(self.__dict__, "devices", None)
+        await self.async_send_message(START_LISTENING_COMMAND.render())
+        return await self.store.wait_for_value(
+            "devices", None, START_LISTENING_TIMEOUT
+        )
 
     async def async_get_device_properties(self):
         if self.devices is None:
@@ -203,25 +366,24 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
 
         for device in self.devices.values():
             _LOGGER.debug(f"{DOMAIN} - get_device_properties - {device}")
-            if await wait_for_value(device.__dict__, "properties", None) is False:
-                return False
-            _LOGGER.debug(f"{DOMAIN} - get_device_properties_metadata - {device}")
-            if (
-                await wait_for_value(device.__dict__, "properties_metadata", None)
-                is False
-            ):
+            if await self.async_wait_for_properties(device) is False:
                 return False
 
         for station in self.stations.values():
-            if await wait_for_value(station.__dict__, "properties", None) is False:
-                return False
-            if (
-                await wait_for_value(station.__dict__, "properties_metadata", None)
-                is False
-            ):
+            if await self.async_wait_for_properties(station) is False:
                 return False
         return True
 
+    async def async_wait_for_properties(self, device: Device) -> bool:
+        if (
+            await device.store.wait_for_value("properties", None, PROPERTIES_TIMEOUT)
+            is False
+        ):
+            return False
+        return await device.store.wait_for_value(
+            "properties_metadata", None, PROPERTIES_TIMEOUT
+        )
+
     async def process_driver_connect_response(self, connected: bool):
         self.driver_connected = connected
 
@@ -244,6 +406,7 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
         for state in states["stations"]:
             device = Device(state["serialNumber"], state)
             self.stations[device.serial_number] = device
+            self.poll_scheduler.register_station(device.serial_number)
 
         self.devices = self.data["devices"]
         self.stations = self.data["stations"]
@@ -280,7 +443,17 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
         device.set_properties_metadata(properties_metadata)
 
     async def on_message(self, message):
-        payload = message.json()
+        trace = self.tracer.start_trace("message")
+        # the whole handling, receiving happened before the callback
+        with trace.span("message"):
+            trace.set("bytes", len(message.data))
+            with trace.span("decode"):
+                payload = message.json(loads=loads)
+            with trace.span("dispatch"):
+                await self.process_message(payload, trace)
+        trace.finish()
+
+    async def process_message(self, payload: dict, trace):
         message_type: str = payload["type"]
         # _LOGGER.debug(f"{DOMAIN} - on_message - {payload}")
         if message_type not in MESSAGE_TYPES_TO_PROCESS:
@@ -292,7 +465,8 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
 
         if message_type == "result":
             message_id = payload["messageId"]
-            _LOGGER.debug(f"{DOMAIN} - on_message - {payload}")
+            trace.set("result", message_id)
+            _LOGGER.debug("%s - on_message - %s", DOMAIN, payload)
 
             if message_id not in MESSAGE_IDS_TO_PROCESS:
                 return
@@ -351,6 +525,7 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
 
         if message_type == "event":
             event_type = message["event"]
+            trace.set("event", event_type)
             # _LOGGER.debug(f"{DOMAIN} - on_message - {payload}")
             if event_type not in EVENT_CONFIGURATION.keys():
                 return
@@ -363,6 +538,7 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
                 return
 
             if event_data_type == "driver":
+                self.poll_scheduler.record_reconnect()
                 await self.process_driver_connect_response(event_value == "connected")
                 return
 
@@ -374,19 +550,44 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
 
             if event_data_type == "state":
                 # _LOGGER.debug(f"{DOMAIN} - on_message - {payload}")
-                self.set_value_for_property(
-                    event_source, serial_number, event_property, event_value
+                self.poll_scheduler.record_push(
+                    self.get_station_serial_number(event_source, serial_number)
                 )
+                with trace.span("state_update"):
+                    self.set_value_for_property(
+                        event_source, serial_number, event_property, event_value
+                    )
+                trace.defer()
 
             if event_data_type == "event":
-                self.devices[serial_number].set_codec(
-                    message["metadata"]["videoCodec"].lower()
-                )
-                self.devices[serial_number].queue.put(event_value)
+                trace.sample(TRACE_STREAM_SAMPLE_RATE)
+                if serial_number in self.foreign_serial_numbers:
+                    return
+                device = self.devices[serial_number]
+                frame = bytes(event_value["data"])
+                if event_type == LIVESTREAM_AUDIO_DATA:
+                    # only AAC is relayed, it is what the cameras send
+                    metadata = message.get("metadata", {})
+                    if metadata.get("audioCodec", "").lower() == "aac":
+                        device.push_stream_data((STREAM_AUDIO, monotonic(), frame))
+                    return
+                device.set_codec(message["metadata"]["videoCodec"].lower())
+                device.keyframe.update(frame, device.codec)
+                device.push_stream_data((STREAM_VIDEO, monotonic(), frame))
+
+    def get_station_serial_number(self, source: str, serial_number: str) -> str:
+        if source == "station" or self.devices is None:
+            return serial_number
+        device: Device = self.devices.get(serial_number, None)
+        if device is None:
+            return serial_number
+        return device.state.get("stationSerialNumber", serial_number)
 
     def set_value_for_property(
         self, source: str, serial_number: str, property_name: str, value: str
     ):
+        if serial_number in self.foreign_serial_numbers:
+            return
         if isinstance(value, str):
             value = value.replace("\x00", "")
         device = None
@@ -397,12 +598,19 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
         try:
             device: Device = target_dict[serial_number]
             device.set_property(property_name, value)
+            self.event_history.record(serial_number, property_name, value)
         except Exception as ex:
             _LOGGER.error(
-                f"{DOMAIN} - Event received but device is missing, maybe not connected"
+                "%s - Event received but device is missing, maybe not connected",
+                DOMAIN,
             )
         _LOGGER.debug(
-            f"{DOMAIN} - set_event_for_entity - {source} / {serial_number} / {property_name} / {value}"
+            "%s - set_event_for_entity - %s / %s / %s / %s",
+            DOMAIN,
+            source,
+            serial_number,
+            property_name,
+            value,
         )
 
     async def on_open(self):
@@ -420,120 +628,111 @@ class EufySecurityDataUpdateCoordinator(DataUpdateCoordinator):
         await self.ws.send_message(message)
 
     async def async_get_properties_metadata_for_device(self, serial_no: str):
-        message = GET_DEVICE_PROPERTIES_METADATA_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = GET_DEVICE_PROPERTIES_METADATA_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_get_properties_for_device(self, serial_no: str):
-        message = GET_DEVICE_PROPERTIES_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = GET_DEVICE_PROPERTIES_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_get_device_voices(self, serial_no: str):
-        message = GET_DEVICE_VOICES_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = GET_DEVICE_VOICES_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_get_properties_metadata_for_station(self, serial_no: str):
-        message = GET_STATION_PROPERTIES_METADATA_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = GET_STATION_PROPERTIES_METADATA_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_get_properties_for_station(self, serial_no: str):
-        message = GET_STATION_PROPERTIES_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = GET_STATION_PROPERTIES_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_get_rtsp_livestream_status(self, serial_no: str):
-        message = GET_RTSP_LIVESTREAM_STATUS_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = GET_RTSP_LIVESTREAM_STATUS_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_get_p2p_livestream_status(self, serial_no: str):
-        message = GET_P2P_LIVESTREAM_STATUS_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = GET_P2P_LIVESTREAM_STATUS_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_quick_response(self, serial_no: str, voice_id: str):
-        message = QUICK_RESPONSE_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["voiceId"] = voice_id
-        await self.async_send_message(json.dumps(message))
+        message = QUICK_RESPONSE_COMMAND.render(
+            serialNumber=serial_no, voiceId=voice_id
+        )
+        await self.async_send_message(message)
 
     async def async_set_rtsp(self, serial_no: str, value: bool):
-        message = SET_RTSP_STREAM_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["value"] = value
-        await self.async_send_message(json.dumps(message))
+        message = SET_RTSP_STREAM_COMMAND.render(serialNumber=serial_no, value=value)
+        await self.async_send_message(message)
 
     async def async_set_rtsp_livestream(self, serial_no: str, value: str):
-        message = SET_RTSP_LIVESTREAM_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["command"] = message["command"].replace("{state}", value)
-        await self.async_send_message(json.dumps(message))
+        message = SET_RTSP_LIVESTREAM_COMMANDS[value].render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_set_p2p_livestream(self, serial_no: str, value: str):
-        message = SET_P2P_LIVESTREAM_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["command"] = message["command"].replace("{state}", value)
-        await self.async_send_message(json.dumps(message))
+        message = SET_P2P_LIVESTREAM_COMMANDS[value].render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_set_device_state(self, serial_no: str, value: bool):
-        message = SET_DEVICE_STATE_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["value"] = value
-        await self.async_send_message(json.dumps(message))
+        message = SET_DEVICE_STATE_COMMAND.render(serialNumber=serial_no, value=value)
+        await self.async_send_message(message)
 
     async def async_set_guard_mode(self, serial_no: str, value: int):
-        message = SET_GUARD_MODE_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["mode"] = value
-        await self.async_send_message(json.dumps(message))
+        message = SET_GUARD_MODE_COMMAND.render(serialNumber=serial_no, mode=value)
+        await self.async_send_message(message)
 
     async def async_trigger_alarm(self, serial_no: str, duration: int = 10):
-        message = STATION_TRIGGER_ALARM.copy()
-        message["serialNumber"] = serial_no
-        message["seconds"] = duration
-        await self.async_send_message(json.dumps(message))
+        message = STATION_TRIGGER_ALARM_COMMAND.render(
+            serialNumber=serial_no, seconds=duration
+        )
+        await self.async_send_message(message)
 
     async def async_reset_alarm(self, serial_no: str):
-        message = STATION_RESET_ALARM.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = STATION_RESET_ALARM_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_trigger_camera_alarm(self, serial_no: str, duration: int = 10):
-        message = CAMERA_TRIGGER_ALARM.copy()
-        message["serialNumber"] = serial_no
-        message["seconds"] = duration
-        await self.async_send_message(json.dumps(message))
+        message = CAMERA_TRIGGER_ALARM_COMMAND.render(
+            serialNumber=serial_no, seconds=duration
+        )
+        await self.async_send_message(message)
 
     async def async_reset_camera_alarm(self, serial_no: str):
-        message = CAMERA_RESET_ALARM.copy()
-        message["serialNumber"] = serial_no
-        await self.async_send_message(json.dumps(message))
+        message = CAMERA_RESET_ALARM_COMMAND.render(serialNumber=serial_no)
+        await self.async_send_message(message)
 
     async def async_set_property(self, serial_no: str, name: str, value: str):
-        message = SET_PROPERTY_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["name"] = name
-        message["value"] = value
-        await self.async_send_message(json.dumps(message))
+        message = SET_PROPERTY_COMMAND.render(
+            serialNumber=serial_no, name=name, value=value
+        )
+        await self.async_send_message(message)
 
     async def async_set_lock(self, serial_no: str, value: bool):
-        message = SET_LOCK_MESSAGE.copy()
-        message["serialNumber"] = serial_no
-        message["value"] = value
-        await self.async_send_message(json.dumps(message))
+        message = SET_LOCK_COMMAND.render(serialNumber=serial_no, value=value)
+        await self.async_send_message(message)
 
     async def async_set_captcha(self, id, captcha: str):
-        message = SET_CAPTCHA_MESSAGE.copy()
-        message["captchaId"] = id
-        message["captcha"] = captcha
-        await self.async_send_message(json.dumps(message))
+        message = SET_CAPTCHA_COMMAND.render(captchaId=id, captcha=captcha)
+        await self.async_send_message(message)
+
+    async def async_poll_if_due(self, event_time_utc=None):
+        if self.poll_scheduler.is_poll_due() is False:
+            return
+        try:
+            await self.async_poll_refresh()
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.debug(f"{DOMAIN} - async_poll_if_due - failed - {ex}")
+
+    async def async_poll_refresh(self):
+        await self.async_send_message(POLL_REFRESH_COMMAND.render())
+        self.poll_scheduler.record_poll()
+        _LOGGER.debug(
+            f"{DOMAIN} - poll_refresh - {self.poll_scheduler.statistics}"
+        )
 
     async def _async_update_data(self):
         try:
-            await self.async_send_message(json.dumps(POLL_REFRESH_MESSAGE))
+            await self.async_poll_refresh()
             return self.data
         except Exception as exception:
             raise UpdateFailed() from exception
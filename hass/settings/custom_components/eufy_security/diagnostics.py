@@ -0,0 +1,23 @@
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import COORDINATOR, DOMAIN, RELAY
+from .coordinator import EufySecurityDataUpdateCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict:
+    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ][COORDINATOR]
+    relay = hass.data.get(RELAY, None)
+    return {
+        "poll_scheduler": coordinator.poll_scheduler.statistics,
+        "websocket": None if coordinator.ws is None else coordinator.ws.statistics,
+        "tracer": coordinator.tracer.statistics,
+        "event_history": coordinator.event_history.statistics,
+        "stream_relay": None
+        if relay is None
+        else relay.statistics(coordinator.devices.keys()),
+    }
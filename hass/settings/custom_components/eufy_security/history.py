@@ -0,0 +1,110 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import heapq
+from itertools import islice
+from time import time
+
+
+class EventRing:
+    """Fixed size ring of (timestamp, value), oldest entries are overwritten.
+
+    Timestamps are kept non-decreasing so a time range is found by bisecting
+    over the logical order of the ring.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity: int = capacity
+        self.timestamps: array = array("d", bytes(8 * capacity))
+        self.values: list = [None] * capacity
+        self.start: int = 0
+        self.count: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> float:
+        # logical index, used by bisect
+        return self.timestamps[(self.start + index) % self.capacity]
+
+    def append(self, timestamp: float, value) -> None:
+        if self.count > 0:
+            timestamp = max(timestamp, self[self.count - 1])
+        if self.count < self.capacity:
+            position = (self.start + self.count) % self.capacity
+            self.count = self.count + 1
+        else:
+            position = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.timestamps[position] = timestamp
+        self.values[position] = value
+
+    def newest_first(self, since: float = None, until: float = None):
+        low = 0 if since is None else bisect_left(self, since)
+        high = self.count if until is None else bisect_right(self, until)
+        for index in range(high - 1, low - 1, -1):
+            position = (self.start + index) % self.capacity
+            yield self.timestamps[position], self.values[position]
+
+
+class EventHistory:
+    """Recent events per device, indexed by serial number and event name."""
+
+    def __init__(self, names: set, capacity: int) -> None:
+        self.names: set = names
+        self.capacity: int = capacity
+        self.devices: dict = {}
+        self.recorded: int = 0
+
+    def record(self, serial_number: str, name: str, value, timestamp: float = None):
+        if name not in self.names:
+            return
+        rings = self.devices.setdefault(serial_number, {})
+        ring = rings.get(name, None)
+        if ring is None:
+            ring = rings[name] = EventRing(self.capacity)
+        ring.append(time() if timestamp is None else timestamp, value)
+        self.recorded = self.recorded + 1
+
+    def query(
+        self,
+        serial_number: str = None,
+        name: str = None,
+        since: float = None,
+        until: float = None,
+        limit: int = None,
+    ) -> list:
+        streams = []
+        for device_serial_number, rings in self.devices.items():
+            if serial_number is not None and device_serial_number != serial_number:
+                continue
+            for ring_name, ring in rings.items():
+                if name is not None and ring_name != name:
+                    continue
+                streams.append(
+                    (
+                        (timestamp, device_serial_number, ring_name, value)
+                        for timestamp, value in ring.newest_first(since, until)
+                    )
+                )
+        merged = heapq.merge(*streams, key=lambda event: event[0], reverse=True)
+        return [
+            {
+                "timestamp": timestamp,
+                "serial_number": device_serial_number,
+                "event": ring_name,
+                "value": value,
+            }
+            for timestamp, device_serial_number, ring_name, value in islice(
+                merged, limit
+            )
+        ]
+
+    @property
+    def statistics(self) -> dict:
+        return {
+            "capacity_per_event": self.capacity,
+            "recorded": self.recorded,
+            "stored": sum(
+                len(ring) for rings in self.devices.values() for ring in rings.values()
+            ),
+        }
@@ -0,0 +1,97 @@
+from time import monotonic
+
+START_CODE = b"\x00\x00\x01"
+LONG_START_CODE = b"\x00\x00\x00\x01"
+
+# parameter set NAL unit types in the order a decoder expects them
+PARAMETER_SET_TYPES = {"h264": (7, 8), "hevc": (32, 33, 34)}
+# IDR for H.264, every IRAP picture (BLA, IDR, CRA) for H.265
+KEYFRAME_TYPES = {"h264": frozenset({5}), "hevc": frozenset(range(16, 22))}
+# NAL unit types below these carry picture data
+VCL_TYPE_LIMIT = {"h264": 6, "hevc": 32}
+
+
+def split_nal_units(frame: bytes) -> list:
+    """Split an Annex B access unit into NAL unit views, without copying."""
+    view = memoryview(frame)
+    start = frame.find(START_CODE)
+    if start < 0:
+        return [view] if len(frame) > 0 else []
+
+    units = []
+    start = start + 3
+    while True:
+        next_start = frame.find(START_CODE, start)
+        if next_start < 0:
+            if start < len(frame):
+                units.append(view[start:])
+            return units
+        end = next_start
+        # a four byte start code leaves its leading zero behind
+        while end > start and frame[end - 1] == 0:
+            end = end - 1
+        if end > start:
+            units.append(view[start:end])
+        start = next_start + 3
+
+
+def nal_unit_type(nal: memoryview, codec: str) -> int:
+    if codec == "hevc":
+        return (nal[0] >> 1) & 0x3F
+    return nal[0] & 0x1F
+
+
+class KeyframeCache:
+    """Most recent keyframe of a stream, decodable on its own.
+
+    Parameter sets are remembered as they pass by and put in front of the
+    keyframe, so a decoder gets everything it needs in a single access unit.
+    """
+
+    def __init__(self) -> None:
+        self.codec: str = None
+        self.parameter_sets: dict = {}
+        self.access_unit: bytes = None
+        self.sequence: int = 0
+        self.updated_at: float = None
+
+    def update(self, frame: bytes, codec: str) -> None:
+        if codec not in KEYFRAME_TYPES:
+            return
+        if codec != self.codec:
+            self.clear()
+            self.codec = codec
+
+        keyframe_types = KEYFRAME_TYPES[codec]
+        parameter_set_types = PARAMETER_SET_TYPES[codec]
+        first_slice_type = None
+        # parameter sets come before the first slice, which tells the frame
+        # type, so the rest of the frame is never scanned
+        start = frame.find(START_CODE)
+        while start >= 0 and start + 3 < len(frame):
+            start = start + 3
+            nal_type = nal_unit_type(frame[start : start + 1], codec)
+            if nal_type < VCL_TYPE_LIMIT[codec]:
+                first_slice_type = nal_type
+                break
+            next_start = frame.find(START_CODE, start)
+            if nal_type in parameter_set_types:
+                end = len(frame) if next_start < 0 else next_start
+                self.parameter_sets[nal_type] = frame[start:end].rstrip(b"\x00")
+            start = next_start
+        if first_slice_type not in keyframe_types:
+            return
+
+        prefix = b"".join(
+            LONG_START_CODE + self.parameter_sets[nal_type]
+            for nal_type in parameter_set_types
+            if nal_type in self.parameter_sets
+        )
+        self.access_unit = prefix + frame
+        self.sequence = self.sequence + 1
+        self.updated_at = monotonic()
+
+    def clear(self) -> None:
+        self.parameter_sets = {}
+        self.access_unit = None
+        self.updated_at = None
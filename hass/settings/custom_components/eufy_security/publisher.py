@@ -0,0 +1,341 @@
+import logging
+import random
+import select
+import socket
+import struct
+from time import monotonic
+from urllib.parse import urlsplit
+
+from .aac import SAMPLES_PER_FRAME, AacConfig, split_adts_frames
+from .const import P2P_PUBLISHER_TIMEOUT
+from .nal import split_nal_units
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+RTP_CLOCK_RATE = 90000
+RTP_PAYLOAD_TYPE = 96
+AUDIO_PAYLOAD_TYPE = 97
+# audio timestamps advance per frame and resync to the arrival time past this
+AUDIO_MAX_DRIFT = 0.1  # seconds
+RTP_PAYLOAD_SIZE = 1400
+# '$', channel, length, then the 12 byte RTP header
+INTERLEAVED_RTP_HEADER = struct.Struct("!BBHBBHII")
+# RFC 3640 AAC-hbr, AU-headers-length of 16 bits and one 13/3 bit AU-header
+AU_HEADER = struct.Struct("!HH")
+# stay well below IOV_MAX for a single sendmsg
+SENDMSG_BATCH = 512
+DRAIN_EVERY = 64  # frames
+
+
+class RtspError(Exception):
+    pass
+
+
+class H264Packetizer:
+    """RFC 6184, single NAL unit packets and FU-A fragments."""
+
+    encoding = "H264"
+    fmtp = "packetization-mode=1"
+
+    def fragments(self, nal: memoryview, size: int):
+        if len(nal) <= size:
+            yield b"", nal
+            return
+        indicator = (nal[0] & 0xE0) | 28
+        nal_type = nal[0] & 0x1F
+        payload = nal[1:]
+        step = size - 2
+        last = len(payload) - step
+        for offset in range(0, len(payload), step):
+            header = nal_type
+            if offset == 0:
+                header = header | 0x80
+            if offset >= last:
+                header = header | 0x40
+            yield bytes((indicator, header)), payload[offset : offset + step]
+
+
+class H265Packetizer:
+    """RFC 7798, single NAL unit packets and type 49 fragmentation units."""
+
+    encoding = "H265"
+    fmtp = None
+
+    def fragments(self, nal: memoryview, size: int):
+        if len(nal) <= size:
+            yield b"", nal
+            return
+        first = (nal[0] & 0x81) | (49 << 1)
+        second = nal[1]
+        nal_type = (nal[0] >> 1) & 0x3F
+        payload = nal[2:]
+        step = size - 3
+        last = len(payload) - step
+        for offset in range(0, len(payload), step):
+            header = nal_type
+            if offset == 0:
+                header = header | 0x80
+            if offset >= last:
+                header = header | 0x40
+            yield bytes((first, second, header)), payload[offset : offset + step]
+
+
+PACKETIZERS = {"h264": H264Packetizer, "hevc": H265Packetizer, "h265": H265Packetizer}
+
+
+class RtspPublisher:
+    """Push a camera's elementary streams to an RTSP server, RTP interleaved on TCP.
+
+    This does what `ffmpeg -vcodec copy -f rtsp` did for P2P streams, without
+    the extra process, the loopback socket and the probing delay. It is
+    blocking and meant to be driven from the camera's queue thread.
+
+    Both tracks take their timestamps from the time a frame reached the
+    coordinator, measured from the first frame sent, which keeps them aligned.
+    """
+
+    def __init__(self, url: str, codec: str, audio: AacConfig = None) -> None:
+        packetizer = PACKETIZERS.get(codec, None)
+        if packetizer is None:
+            raise RtspError(f"unsupported codec {codec}")
+        parts = urlsplit(url)
+        self.url: str = url
+        self.host: str = parts.hostname
+        self.port: int = parts.port or 554
+        self.codec: str = codec
+        self.packetizer = packetizer()
+        self.sock: socket.socket = None
+        self.reader = None
+        self.cseq: int = 0
+        self.session: str = None
+        self.ssrc: int = random.getrandbits(32)
+        self.sequence: int = random.getrandbits(16)
+        self.epoch: float = None
+        self.audio: AacConfig = audio
+        self.audio_ssrc: int = random.getrandbits(32)
+        self.audio_sequence: int = random.getrandbits(16)
+        self.audio_timestamp: int = None
+
+        self.frames_sent: int = 0
+        self.audio_frames_sent: int = 0
+        self.packets_sent: int = 0
+        self.bytes_sent: int = 0
+
+    def connect(self) -> None:
+        self.sock = socket.create_connection(
+            (self.host, self.port), timeout=P2P_PUBLISHER_TIMEOUT
+        )
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        self.request(
+            "ANNOUNCE", self.url, {"Content-Type": "application/sdp"}, self.sdp
+        )
+        headers = self.request(
+            "SETUP",
+            f"{self.url}/trackID=0",
+            {"Transport": "RTP/AVP/TCP;unicast;interleaved=0-1;mode=record"},
+        )
+        self.session = headers.get("session", "").split(";")[0] or None
+        if self.audio is not None:
+            self.request(
+                "SETUP",
+                f"{self.url}/trackID=1",
+                {"Transport": "RTP/AVP/TCP;unicast;interleaved=2-3;mode=record"},
+            )
+        self.request("RECORD", self.url, {"Range": "npt=0.000-"})
+        _LOGGER.debug(
+            "RTSP publisher recording to %s (%s, audio %s)",
+            self.url,
+            self.codec,
+            self.audio is not None,
+        )
+
+    @property
+    def sdp(self) -> str:
+        lines = [
+            "v=0",
+            f"o=- 0 0 IN IP4 {self.host}",
+            "s=eufy_security",
+            f"c=IN IP4 {self.host}",
+            "t=0 0",
+            f"m=video 0 RTP/AVP {RTP_PAYLOAD_TYPE}",
+            f"a=rtpmap:{RTP_PAYLOAD_TYPE} {self.packetizer.encoding}/{RTP_CLOCK_RATE}",
+        ]
+        if self.packetizer.fmtp is not None:
+            lines.append(f"a=fmtp:{RTP_PAYLOAD_TYPE} {self.packetizer.fmtp}")
+        lines.append("a=control:trackID=0")
+        if self.audio is not None:
+            lines.extend(
+                [
+                    f"m=audio 0 RTP/AVP {AUDIO_PAYLOAD_TYPE}",
+                    f"a=rtpmap:{AUDIO_PAYLOAD_TYPE} MPEG4-GENERIC/"
+                    f"{self.audio.sample_rate}/{self.audio.channels}",
+                    f"a=fmtp:{AUDIO_PAYLOAD_TYPE} streamtype=5;profile-level-id=1;"
+                    "mode=AAC-hbr;sizelength=13;indexlength=3;indexdeltalength=3;"
+                    f"config={self.audio.audio_specific_config}",
+                    "a=control:trackID=1",
+                ]
+            )
+        return "\r\n".join(lines) + "\r\n"
+
+    def request(self, method: str, url: str, headers: dict = None, body: str = ""):
+        self.cseq = self.cseq + 1
+        lines = [f"{method} {url} RTSP/1.0", f"CSeq: {self.cseq}"]
+        if self.session is not None:
+            lines.append(f"Session: {self.session}")
+        for key, value in (headers or {}).items():
+            lines.append(f"{key}: {value}")
+        content = body.encode("utf-8")
+        if len(content) > 0:
+            lines.append(f"Content-Length: {len(content)}")
+        self.sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + content)
+        return self.read_response(method)
+
+    def read_response(self, method: str) -> dict:
+        status_line = self.reader.readline().decode("utf-8", "replace").strip()
+        headers = {}
+        while True:
+            line = self.reader.readline().decode("utf-8", "replace").strip()
+            if line == "":
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > 0:
+            self.reader.read(length)
+        status = status_line.split(" ", 2)
+        if len(status) < 2 or status[1] != "200":
+            raise RtspError(f"{method} {self.url} failed - {status_line}")
+        return headers
+
+    def elapsed(self, received_at: float) -> float:
+        if self.epoch is None:
+            self.epoch = received_at
+        return max(received_at - self.epoch, 0)
+
+    def send_frame(self, frame: bytes, received_at: float = None) -> None:
+        if received_at is None:
+            received_at = monotonic()
+        timestamp = int(self.elapsed(received_at) * RTP_CLOCK_RATE) & 0xFFFFFFFF
+        packets = [
+            fragment
+            for nal in split_nal_units(frame)
+            for fragment in self.packetizer.fragments(nal, RTP_PAYLOAD_SIZE)
+        ]
+        buffers = []
+        last = len(packets) - 1
+        for index, (prefix, payload) in enumerate(packets):
+            marker = 0x80 if index == last else 0
+            buffers.append(
+                INTERLEAVED_RTP_HEADER.pack(
+                    0x24,
+                    0,
+                    12 + len(prefix) + len(payload),
+                    0x80,
+                    marker | RTP_PAYLOAD_TYPE,
+                    self.sequence,
+                    timestamp,
+                    self.ssrc,
+                )
+                + prefix
+            )
+            buffers.append(payload)
+            self.sequence = (self.sequence + 1) & 0xFFFF
+
+        self.write(buffers)
+        self.frames_sent = self.frames_sent + 1
+        self.packets_sent = self.packets_sent + len(packets)
+        if self.frames_sent % DRAIN_EVERY == 0:
+            self.drain()
+
+    def send_audio(self, data: bytes, received_at: float = None) -> None:
+        if self.audio is None:
+            return
+        if received_at is None:
+            received_at = monotonic()
+        sample_rate = self.audio.sample_rate
+        arrival = int(self.elapsed(received_at) * sample_rate)
+        if (
+            self.audio_timestamp is None
+            or abs(self.audio_timestamp - arrival) > AUDIO_MAX_DRIFT * sample_rate
+        ):
+            self.audio_timestamp = arrival
+
+        buffers = []
+        for frame in split_adts_frames(data):
+            buffers.append(
+                INTERLEAVED_RTP_HEADER.pack(
+                    0x24,
+                    2,
+                    12 + AU_HEADER.size + len(frame),
+                    0x80,
+                    0x80 | AUDIO_PAYLOAD_TYPE,
+                    self.audio_sequence,
+                    self.audio_timestamp & 0xFFFFFFFF,
+                    self.audio_ssrc,
+                )
+                + AU_HEADER.pack(16, len(frame) << 3)
+            )
+            buffers.append(frame)
+            self.audio_sequence = (self.audio_sequence + 1) & 0xFFFF
+            self.audio_timestamp = self.audio_timestamp + SAMPLES_PER_FRAME
+            self.audio_frames_sent = self.audio_frames_sent + 1
+
+        self.write(buffers)
+        self.packets_sent = self.packets_sent + len(buffers) // 2
+
+    def write(self, buffers: list) -> None:
+        for start in range(0, len(buffers), SENDMSG_BATCH):
+            batch = buffers[start : start + SENDMSG_BATCH]
+            remaining = sum(len(buffer) for buffer in batch)
+            self.bytes_sent = self.bytes_sent + remaining
+            while remaining > 0:
+                sent = self.sock.sendmsg(batch)
+                remaining = remaining - sent
+                if remaining > 0:
+                    batch = self.skip(batch, sent)
+
+    @staticmethod
+    def skip(buffers: list, sent: int) -> list:
+        # drop what a partial sendmsg already wrote
+        for index, buffer in enumerate(buffers):
+            if sent < len(buffer):
+                return [memoryview(buffer)[sent:]] + buffers[index + 1 :]
+            sent = sent - len(buffer)
+        return []
+
+    def drain(self) -> None:
+        # receiver reports from the server are not used, keep the buffer empty
+        while len(select.select([self.sock], [], [], 0)[0]) > 0:
+            if len(self.sock.recv(65536)) == 0:
+                raise ConnectionResetError("RTSP server closed the connection")
+
+    def close(self) -> None:
+        if self.sock is None:
+            return
+        try:
+            self.sock.settimeout(1)
+            self.cseq = self.cseq + 1
+            self.sock.sendall(
+                (
+                    f"TEARDOWN {self.url} RTSP/1.0\r\nCSeq: {self.cseq}\r\n"
+                    f"Session: {self.session}\r\n\r\n"
+                ).encode("utf-8")
+            )
+        except OSError:
+            pass
+        finally:
+            self.reader.close()
+            self.sock.close()
+            self.reader = None
+            self.sock = None
+
+    @property
+    def statistics(self) -> dict:
+        return {
+            "codec": self.codec,
+            "frames_sent": self.frames_sent,
+            "audio_frames_sent": self.audio_frames_sent,
+            "packets_sent": self.packets_sent,
+            "bytes_sent": self.bytes_sent,
+        }
@@ -0,0 +1,256 @@
+from collections import deque
+import logging
+import selectors
+import socket
+import threading
+from time import monotonic
+
+from homeassistant.core import HomeAssistant
+
+from .const import RELAY, RELAY_BUFFER_LIMIT, STREAM_VIDEO, Device
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+RESPONSE_OK = b"HTTP/1.0 200 OK\r\nContent-Type: application/octet-stream\r\nConnection: close\r\n\r\n"
+RESPONSE_NOT_FOUND = b"HTTP/1.0 404 Not Found\r\nConnection: close\r\n\r\n"
+SENDMSG_BATCH = 64
+
+
+class RelayStream:
+    def __init__(self, device: Device) -> None:
+        self.device: Device = device
+        self.connection: socket.socket = None
+        self.request: bytes = b""
+        self.buffer: deque = deque()
+        self.buffered_bytes: int = 0
+        self.partial: bool = False
+        self.stalled: bool = False
+
+        self.connected_at: float = None
+        self.connections: int = 0
+        self.frames_sent: int = 0
+        self.bytes_sent: int = 0
+        self.stalls: int = 0
+        self.frames_dropped: int = 0
+
+    @property
+    def statistics(self) -> dict:
+        bytes_per_second = None
+        if self.connection is not None and self.connected_at is not None:
+            elapsed = max(monotonic() - self.connected_at, 1)
+            bytes_per_second = round(self.bytes_sent / elapsed, 1)
+        return {
+            "connected": self.connection is not None,
+            "connections": self.connections,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_second": bytes_per_second,
+            "buffered_bytes": self.buffered_bytes,
+            "stalls": self.stalls,
+            "frames_dropped": self.frames_dropped,
+        }
+
+
+class StreamRelay:
+    """Feed every camera's P2P video to its ffmpeg from one thread.
+
+    ffmpeg reads http://127.0.0.1:<port>/<serial number>, the path picks the
+    stream. A single selector loop accepts those connections and writes the
+    queued frames without blocking, so a slow reader only stalls itself.
+    Devices wake the loop through a socket pair when they queue a frame.
+    """
+
+    def __init__(self) -> None:
+        self.streams: dict = {}
+        self.lock = threading.Lock()
+        self.selector = selectors.DefaultSelector()
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen()
+        self.server.setblocking(False)
+        self.port: int = self.server.getsockname()[1]
+        self.selector.register(self.server, selectors.EVENT_READ, None)
+
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_reader.setblocking(False)
+        self.wake_writer.setblocking(False)
+        self.selector.register(self.wake_reader, selectors.EVENT_READ, None)
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        _LOGGER.debug("stream relay listening on port %s", self.port)
+
+    def register(self, device: Device) -> str:
+        with self.lock:
+            self.streams[device.serial_number] = RelayStream(device)
+        device.set_stream_listener(self.wake)
+        return f"http://127.0.0.1:{self.port}/{device.serial_number}"
+
+    def unregister(self, device: Device) -> None:
+        device.set_stream_listener(None)
+        with self.lock:
+            stream = self.streams.pop(device.serial_number, None)
+        if stream is not None and stream.connection is not None:
+            # the relay thread notices the closed socket and forgets it
+            try:
+                stream.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.wake()
+
+    def wake(self) -> None:
+        try:
+            self.wake_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def statistics(self, serial_numbers) -> dict:
+        with self.lock:
+            return {
+                serial_number: self.streams[serial_number].statistics
+                for serial_number in serial_numbers
+                if serial_number in self.streams
+            }
+
+    def run(self) -> None:
+        while True:
+            for key, mask in self.selector.select(timeout=1):
+                try:
+                    if key.fileobj is self.server:
+                        self.accept()
+                    elif key.fileobj is self.wake_reader:
+                        while len(self.wake_reader.recv(4096)) > 0:
+                            pass
+                    elif key.data.connection is None:
+                        self.read_request(key.fileobj, key.data)
+                    elif mask & selectors.EVENT_READ:
+                        self.check_closed(key.data)
+                except (BlockingIOError, InterruptedError):
+                    pass
+                except OSError as ex:
+                    _LOGGER.debug("stream relay - %s", ex)
+
+            with self.lock:
+                streams = list(self.streams.values())
+            for stream in streams:
+                if stream.connection is not None:
+                    self.pump(stream)
+
+    def accept(self) -> None:
+        connection, _ = self.server.accept()
+        connection.setblocking(False)
+        self.selector.register(connection, selectors.EVENT_READ, RelayStream(None))
+
+    def read_request(self, connection: socket.socket, pending: RelayStream) -> None:
+        data = connection.recv(4096)
+        if len(data) == 0:
+            self.drop(connection)
+            return
+        pending.request = pending.request + data
+        if b"\r\n\r\n" not in pending.request:
+            return
+
+        parts = pending.request.split(b" ", 2)
+        serial_number = parts[1].decode("ascii", "replace").strip("/") if len(parts) > 1 else ""
+        with self.lock:
+            stream = self.streams.get(serial_number, None)
+        if stream is None:
+            connection.send(RESPONSE_NOT_FOUND)
+            self.drop(connection)
+            return
+
+        connection.send(RESPONSE_OK)
+        if stream.connection is not None:
+            self.close_stream(stream)
+        self.selector.modify(connection, selectors.EVENT_READ, stream)
+        stream.connection = connection
+        stream.connected_at = monotonic()
+        stream.connections = stream.connections + 1
+        stream.bytes_sent = 0
+        _LOGGER.debug("stream relay - %s connected", serial_number)
+
+    def check_closed(self, stream: RelayStream) -> None:
+        # ffmpeg never sends anything after its request, data means EOF or junk
+        if len(stream.connection.recv(4096)) == 0:
+            self.close_stream(stream)
+
+    def pump(self, stream: RelayStream) -> None:
+        device = stream.device
+        if device.is_streaming is True:
+            while not device.queue.empty():
+                kind, _, data = device.queue.get_nowait()
+                # ffmpeg reads raw video here, audio is not relayed
+                if kind != STREAM_VIDEO:
+                    continue
+                stream.buffer.append(memoryview(data))
+                stream.buffered_bytes = stream.buffered_bytes + len(data)
+            # a partly sent frame has to be finished, the oldest whole one goes
+            first = 1 if stream.partial is True else 0
+            while stream.buffered_bytes > RELAY_BUFFER_LIMIT and len(stream.buffer) > first + 1:
+                dropped = stream.buffer[first]
+                del stream.buffer[first]
+                stream.buffered_bytes = stream.buffered_bytes - len(dropped)
+                stream.frames_dropped = stream.frames_dropped + 1
+
+        while len(stream.buffer) > 0:
+            batch = [stream.buffer[index] for index in range(min(len(stream.buffer), SENDMSG_BATCH))]
+            try:
+                sent = stream.connection.sendmsg(batch)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError as ex:
+                _LOGGER.debug("stream relay - %s - %s", device.serial_number, ex)
+                self.close_stream(stream)
+                return
+            stream.bytes_sent = stream.bytes_sent + sent
+            stream.buffered_bytes = stream.buffered_bytes - sent
+            short = sent < sum(len(view) for view in batch)
+            while sent > 0:
+                head = stream.buffer[0]
+                if sent < len(head):
+                    stream.buffer[0] = head[sent:]
+                    stream.partial = True
+                    sent = 0
+                else:
+                    stream.buffer.popleft()
+                    stream.partial = False
+                    stream.frames_sent = stream.frames_sent + 1
+                    sent = sent - len(head)
+            if short is True:
+                # the reader is not keeping up, retry once its socket is writable
+                if stream.stalled is False:
+                    stream.stalls = stream.stalls + 1
+                    stream.stalled = True
+                    self.selector.modify(
+                        stream.connection,
+                        selectors.EVENT_READ | selectors.EVENT_WRITE,
+                        stream,
+                    )
+                return
+        if stream.stalled is True:
+            stream.stalled = False
+            self.selector.modify(stream.connection, selectors.EVENT_READ, stream)
+
+    def close_stream(self, stream: RelayStream) -> None:
+        self.drop(stream.connection)
+        stream.connection = None
+        stream.buffer.clear()
+        stream.buffered_bytes = 0
+        stream.partial = False
+        stream.stalled = False
+
+    def drop(self, connection: socket.socket) -> None:
+        try:
+            self.selector.unregister(connection)
+        except (KeyError, ValueError):
+            pass
+        connection.close()
+
+
+def get_stream_relay(hass: HomeAssistant) -> StreamRelay:
+    # one relay serves the cameras of every config entry
+    relay = hass.data.get(RELAY, None)
+    if relay is None:
+        relay = hass.data[RELAY] = StreamRelay()
+    return relay
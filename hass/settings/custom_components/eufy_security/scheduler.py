@@ -0,0 +1,106 @@
+import logging
+from time import monotonic
+
+from .const import POLL_MAX_BACKOFF
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+SECONDS_PER_DAY = 86400
+
+
+class StationPollState:
+    def __init__(self, interval: float) -> None:
+        self.interval: float = interval
+        self.last_push: float = None
+        self.changed: bool = False
+
+
+class AdaptivePollScheduler:
+    """Decide when driver.poll_refresh is worth sending.
+
+    Push events prove that the cloud link is healthy, so a station is not due
+    while it keeps sending them. Stations that stay unchanged across polls are
+    polled less often, up to POLL_MAX_BACKOFF times the sync interval. A
+    reconnect, or the link going silent for a full sync interval, makes a poll
+    due right away.
+    """
+
+    def __init__(self, base_interval: float) -> None:
+        self.base_interval: float = base_interval
+        self.max_interval: float = base_interval * POLL_MAX_BACKOFF
+        self.stations: dict = {}
+        self.started_at: float = monotonic()
+        self.last_poll: float = None
+        self.last_push: float = None
+        self.reconnected: bool = True
+        self.polls_sent: int = 0
+
+    def register_station(self, serial_number: str) -> None:
+        if serial_number not in self.stations:
+            self.stations[serial_number] = StationPollState(self.base_interval)
+
+    def record_push(self, serial_number: str, now: float = None) -> None:
+        now = monotonic() if now is None else now
+        self.last_push = now
+        station = self.stations.get(serial_number)
+        if station is not None:
+            station.last_push = now
+            station.changed = True
+
+    def record_reconnect(self) -> None:
+        self.reconnected = True
+
+    def record_poll(self, now: float = None) -> None:
+        now = monotonic() if now is None else now
+        for station in self.stations.values():
+            if station.changed is True:
+                station.interval = self.base_interval
+            else:
+                station.interval = min(station.interval * 2, self.max_interval)
+            station.changed = False
+        self.last_poll = now
+        self.reconnected = False
+        self.polls_sent = self.polls_sent + 1
+
+    def is_poll_due(self, now: float = None) -> bool:
+        now = monotonic() if now is None else now
+        if self.reconnected is True or self.last_poll is None:
+            return True
+
+        # link went quiet after the last poll, probe it once instead of waiting
+        last_activity = max(self.last_poll, self.last_push or 0)
+        if (
+            last_activity > self.last_poll
+            and now - last_activity >= self.base_interval
+        ):
+            return True
+
+        if len(self.stations) == 0:
+            return now - self.last_poll >= self.base_interval
+
+        for station in self.stations.values():
+            since = max(self.last_poll, station.last_push or 0)
+            if now - since >= station.interval:
+                return True
+        return False
+
+    @property
+    def polls_avoided_per_day(self) -> float:
+        elapsed = monotonic() - self.started_at
+        if elapsed < self.base_interval:
+            return 0
+        fixed_polls = elapsed / self.base_interval
+        avoided = max(0, fixed_polls - self.polls_sent)
+        return round(avoided * SECONDS_PER_DAY / elapsed, 1)
+
+    @property
+    def statistics(self) -> dict:
+        return {
+            "base_interval": self.base_interval,
+            "polls_sent": self.polls_sent,
+            "polls_avoided_per_day": self.polls_avoided_per_day,
+            "station_intervals": {
+                serial_number: station.interval
+                for serial_number, station in self.stations.items()
+            },
+        }
@@ -1,4 +1,6 @@
+import json
 import logging
+from types import MappingProxyType
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.config_entries import ConfigEntry
@@ -12,52 +14,55 @@ from .entity import EufySecurityEntity
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+INSTRUMENTS = [
+    ("night_vision", "Night Vision", "nightvision", EntityCategory.CONFIG),
+    (
+        "power_working_mode",
+        "Power Working Mode",
+        "powerWorkingMode",
+        EntityCategory.CONFIG,
+    ),
+    (
+        "video_streaming_quality",
+        "Video Streaming Quality",
+        "videoStreamingQuality",
+        EntityCategory.CONFIG,
+    ),
+    (
+        "video_recording_quality",
+        "Video Recording Quality",
+        "videoRecordingQuality",
+        EntityCategory.CONFIG,
+    ),
+    (
+        "motion_detection_type",
+        "Motion Detection Type",
+        "motionDetectionType",
+        EntityCategory.CONFIG,
+    ),
+    ("rotation_speed", "Rotation Speed", "rotationSpeed", EntityCategory.CONFIG),
+    ("charging_status", "Charging Status", "chargingStatus", EntityCategory.CONFIG),
+    (
+        "chime_volume",
+        "Chime Volume",
+        "chimeHomebaseRingtoneVolume",
+        EntityCategory.CONFIG,
+    ),
+]
+
+
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
 ):
-    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
-
-    INSTRUMENTS = [
-        ("night_vision", "Night Vision", "nightvision", EntityCategory.CONFIG),
-        (
-            "power_working_mode",
-            "Power Working Mode",
-            "powerWorkingMode",
-            EntityCategory.CONFIG,
-        ),
-        (
-            "video_streaming_quality",
-            "Video Streaming Quality",
-            "videoStreamingQuality",
-            EntityCategory.CONFIG,
-        ),
-        (
-            "video_recording_quality",
-            "Video Recording Quality",
-            "videoRecordingQuality",
-            EntityCategory.CONFIG,
-        ),
-        (
-            "motion_detection_type",
-            "Motion Detection Type",
-            "motionDetectionType",
-            EntityCategory.CONFIG,
-        ),
-        ("rotation_speed", "Rotation Speed", "rotationSpeed", EntityCategory.CONFIG),
-        ("charging_status", "Charging Status", "chargingStatus", EntityCategory.CONFIG),
-        (
-            "chime_volume",
-            "Chime Volume",
-            "chimeHomebaseRingtoneVolume",
-            EntityCategory.CONFIG,
-        ),
-    ]
+    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ][COORDINATOR]
 
     entities = []
     for device in coordinator.devices.values():
-        instruments = INSTRUMENTS
-        for id, description, key, entity_category in instruments:
-            if not get_child_value(device.state, key) is None:
+        capabilities = coordinator.capabilities[device.serial_number]
+        for id, description, key, entity_category in INSTRUMENTS:
+            if f"state.{key}" in capabilities:
                 entities.append(
                     EufySelectEntity(
                         coordinator,
@@ -73,6 +78,89 @@ async def async_setup_entry(
     async_add_devices(entities, True)
 
 
+class StatesOptionTable:
+    """Value to option mapping for a property that lists its states."""
+
+    __slots__ = ("values_to_states", "states_to_values", "_options")
+
+    def __init__(self, states: dict) -> None:
+        self.values_to_states = MappingProxyType(dict(states))
+        self.states_to_values = MappingProxyType({v: k for k, v in states.items()})
+        self._options: list = None
+
+    def to_option(self, value: str) -> str:
+        return self.values_to_states.get(value, None)
+
+    def to_value(self, option: str) -> str:
+        return self.states_to_values[option]
+
+    @property
+    def options(self) -> list:
+        if self._options is None:
+            self._options = list(self.values_to_states.values())
+        return self._options
+
+    def __repr__(self) -> str:
+        return f"states {dict(self.values_to_states)}"
+
+
+class RangeOptionTable:
+    """Numeric property without states, options are computed from min and max."""
+
+    __slots__ = ("min_value", "max_value", "_options")
+
+    def __init__(self, min_value: int, max_value: int) -> None:
+        self.min_value: int = min_value
+        self.max_value: int = max_value
+        self._options: list = None
+
+    def to_option(self, value: str) -> str:
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return None
+        if str(number) != value or not self.min_value <= number <= self.max_value:
+            return None
+        return value
+
+    def to_value(self, option: str) -> str:
+        if self.to_option(option) is None:
+            raise KeyError(option)
+        return option
+
+    @property
+    def options(self) -> list:
+        # built on first use, then shared by every entity using this table
+        if self._options is None:
+            self._options = [
+                str(i) for i in range(self.min_value, self.max_value + 1)
+            ]
+        return self._options
+
+    def __repr__(self) -> str:
+        return f"range {self.min_value}..{self.max_value}"
+
+
+# identical devices report identical metadata, so their entities share a table
+OPTION_TABLES: dict = {}
+
+
+def get_option_table(model: str, key: str, metadata: dict):
+    table_key = (model, key, json.dumps(metadata, sort_keys=True, default=str))
+    table = OPTION_TABLES.get(table_key, None)
+    if table is not None:
+        return table
+
+    states = metadata.get("states", {})
+    if len(states) > 0:
+        table = StatesOptionTable(states)
+    else:
+        table = RangeOptionTable(metadata.get("min", 0), metadata.get("max", 0))
+    OPTION_TABLES[table_key] = table
+    _LOGGER.debug("%s - select option table - %s - %s - %s", DOMAIN, model, key, table)
+    return table
+
+
 class EufySelectEntity(EufySecurityEntity, SelectEntity):
     def __init__(
         self,
@@ -90,41 +178,33 @@ class EufySelectEntity(EufySecurityEntity, SelectEntity):
         self.description = description
         self.key = key
         self.metadata = get_child_value(self.device.properties_metadata, self.key)
-        _LOGGER.debug(
-            f"{DOMAIN} - {self.device.name} - {self.id} - select init - {self.metadata}"
-        )
-        self.states = self.metadata.get("states", {})
-        if len(self.states) == 0:
-            min_value = self.metadata.get("min", 0)
-            max_value = self.metadata.get("max", 0)
-            self.states = {str(i): str(i) for i in range(min_value, max_value+1)}
-
-        self.values_to_states = self.states
-        self.states_to_values = {v: k for k, v in self.values_to_states.items()}
-        self._attr_options: list[str] = list(self.values_to_states.values())
+        self.option_table = get_option_table(self.device.model, self.key, self.metadata)
         self._attr_entity_category = entity_category
 
-        _LOGGER.debug(
-            f"{DOMAIN} - {self.device.name} - {self.id} - select init - {self.values_to_states} - {self.states_to_values}"
-        )
-
         current_value = str(get_child_value(self.device.state, self.key))
-        current_option = self.values_to_states.get(current_value, None)
-        if current_option is None:
+        if self.option_table.to_option(current_value) is None:
             _LOGGER.error(
-                f"{DOMAIN} - {self.device.name} - {self.id} - select init missing value error - value: {current_value} - values_to_states: {self.values_to_states} - states_to_values: {self.states_to_values}"
+                "%s - %s - %s - select init missing value error - value: %s - %s",
+                DOMAIN,
+                self.device.name,
+                self.id,
+                current_value,
+                self.option_table,
             )
 
+    @property
+    def options(self) -> list:
+        return self.option_table.options
+
     async def async_select_option(self, option: str):
         await self.coordinator.async_set_property(
-            self.device.serial_number, self.key, self.states_to_values[option]
+            self.device.serial_number, self.key, self.option_table.to_value(option)
         )
 
     @property
     def current_option(self) -> str:
         current_value = str(get_child_value(self.device.state, self.key))
-        current_option = self.values_to_states.get(current_value, None)
-        return current_option
+        return self.option_table.to_option(current_value)
 
     @property
     def name(self):
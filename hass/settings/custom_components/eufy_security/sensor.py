@@ -17,74 +17,78 @@ from .entity import EufySecurityEntity
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+INSTRUMENTS = [
+    (
+        "battery",
+        "Battery",
+        "state.battery",
+        PERCENTAGE,
+        None,
+        DEVICE_CLASS_BATTERY,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "wifiRSSI",
+        "Wifi RSSI",
+        "state.wifiRSSI",
+        None,
+        None,
+        DEVICE_CLASS_SIGNAL_STRENGTH,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "detected_person_name",
+        "Detected Person Name",
+        "state.personName",
+        None,
+        None,
+        None,
+        None,
+    ),
+]
+
+CAMERA_INSTRUMENTS = [
+    (
+        "stream_source_type",
+        "Streaming Source Type",
+        "stream_source_type",
+        None,
+        None,
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    (
+        "stream_source_address",
+        "Streaming Source Address",
+        "stream_source_address",
+        None,
+        None,
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+    ("codec", "Codec", "codec", None, None, None, EntityCategory.DIAGNOSTIC),
+    (
+        "stream_queue_size",
+        "Stream Queue Size",
+        "queue",
+        None,
+        None,
+        None,
+        EntityCategory.DIAGNOSTIC,
+    ),
+]
+
+
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
 ):
-    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
-
-    INSTRUMENTS = [
-        (
-            "battery",
-            "Battery",
-            "state.battery",
-            PERCENTAGE,
-            None,
-            DEVICE_CLASS_BATTERY,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "wifiRSSI",
-            "Wifi RSSI",
-            "state.wifiRSSI",
-            None,
-            None,
-            DEVICE_CLASS_SIGNAL_STRENGTH,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "detected_person_name",
-            "Detected Person Name",
-            "state.personName",
-            None,
-            None,
-            None,
-            None,
-        ),
-    ]
-
-    CAMERA_INSTRUMENTS = [
-        (
-            "stream_source_type",
-            "Streaming Source Type",
-            "stream_source_type",
-            None,
-            None,
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        (
-            "stream_source_address",
-            "Streaming Source Address",
-            "stream_source_address",
-            None,
-            None,
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-        ("codec", "Codec", "codec", None, None, None, EntityCategory.DIAGNOSTIC),
-        (
-            "stream_queue_size",
-            "Stream Queue Size",
-            "queue",
-            None,
-            None,
-            None,
-            EntityCategory.DIAGNOSTIC,
-        ),
-    ]
+    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ][COORDINATOR]
 
     entities = []
     for device in coordinator.devices.values():
+        capabilities = coordinator.capabilities[device.serial_number]
         instruments = INSTRUMENTS
         if device.is_camera() is True:
             instruments = instruments + CAMERA_INSTRUMENTS
@@ -97,7 +101,7 @@ async def async_setup_entry(
             device_class,
             entity_category,
         ) in instruments:
-            if not get_child_value(device.__dict__, key) is None:
+            if key in capabilities:
                 entities.append(
                     EufySecuritySensor(
                         coordinator,
@@ -12,61 +12,64 @@ from .entity import EufySecurityEntity
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+INSTRUMENTS = [
+    ("enabled", "Enabled", "enabled", EntityCategory.CONFIG),
+    (
+        "motion_detection",
+        "Motion Detection",
+        "motionDetection",
+        EntityCategory.CONFIG,
+    ),
+    ("motion_tracking", "Motion Tracking", "motionTracking", EntityCategory.CONFIG),
+    (
+        "person_detection",
+        "Person Detection",
+        "personDetection",
+        EntityCategory.CONFIG,
+    ),
+    ("pet_detection", "Pet Detection", "petDetection", EntityCategory.CONFIG),
+    (
+        "crying_detection",
+        "Crying Detection",
+        "cryingDetection",
+        EntityCategory.CONFIG,
+    ),
+    ("indoor_chime", "Indoor Chime", "chimeIndoor", EntityCategory.CONFIG),
+    ("status_led", "Status Led", "statusLed", EntityCategory.CONFIG),
+    (
+        "anti_theft_detection",
+        "Anti Theft Detection",
+        "antitheftDetection",
+        EntityCategory.CONFIG,
+    ),
+    (
+        "auto_night_vision",
+        "Auto Night Vision",
+        "autoNightvision",
+        EntityCategory.CONFIG,
+    ),
+    ("night_vision", "Night Vision", "nightvision", EntityCategory.CONFIG),
+    ("microphone", "Microphone", "microphone", EntityCategory.CONFIG),
+    ("speaker", "Speaker", "speaker", EntityCategory.CONFIG),
+    ("audio_recording", "Audio Recording", "audioRecording", EntityCategory.CONFIG),
+    ("sound_detection", "Sound Detection", "soundDetection", EntityCategory.CONFIG),
+    ("light", "Light", "light", EntityCategory.CONFIG),
+    ("rtsp_stream", "RTSP Stream", "rtspStream", EntityCategory.CONFIG),
+]
+
+
 async def async_setup_entry(
     hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
 ):
-    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][COORDINATOR]
-
-    INSTRUMENTS = [
-        ("enabled", "Enabled", "enabled", EntityCategory.CONFIG),
-        (
-            "motion_detection",
-            "Motion Detection",
-            "motionDetection",
-            EntityCategory.CONFIG,
-        ),
-        ("motion_tracking", "Motion Tracking", "motionTracking", EntityCategory.CONFIG),
-        (
-            "person_detection",
-            "Person Detection",
-            "personDetection",
-            EntityCategory.CONFIG,
-        ),
-        ("pet_detection", "Pet Detection", "petDetection", EntityCategory.CONFIG),
-        (
-            "crying_detection",
-            "Crying Detection",
-            "cryingDetection",
-            EntityCategory.CONFIG,
-        ),
-        ("indoor_chime", "Indoor Chime", "chimeIndoor", EntityCategory.CONFIG),
-        ("status_led", "Status Led", "statusLed", EntityCategory.CONFIG),
-        (
-            "anti_theft_detection",
-            "Anti Theft Detection",
-            "antitheftDetection",
-            EntityCategory.CONFIG,
-        ),
-        (
-            "auto_night_vision",
-            "Auto Night Vision",
-            "autoNightvision",
-            EntityCategory.CONFIG,
-        ),
-        ("night_vision", "Night Vision", "nightvision", EntityCategory.CONFIG),
-        ("microphone", "Microphone", "microphone", EntityCategory.CONFIG),
-        ("speaker", "Speaker", "speaker", EntityCategory.CONFIG),
-        ("audio_recording", "Audio Recording", "audioRecording", EntityCategory.CONFIG),
-        ("sound_detection", "Sound Detection", "soundDetection", EntityCategory.CONFIG),
-        ("light", "Light", "light", EntityCategory.CONFIG),
-        ("rtsp_stream", "RTSP Stream", "rtspStream", EntityCategory.CONFIG),
-    ]
+    coordinator: EufySecurityDataUpdateCoordinator = hass.data[DOMAIN][
+        config_entry.entry_id
+    ][COORDINATOR]
 
     entities = []
     for device in coordinator.devices.values():
-        instruments = INSTRUMENTS
-        for id, description, key, entity_category in instruments:
-            if not get_child_value(device.state, key) is None:
+        capabilities = coordinator.capabilities[device.serial_number]
+        for id, description, key, entity_category in INSTRUMENTS:
+            if f"state.{key}" in capabilities:
                 entities.append(
                     EufySwitchEntity(
                         coordinator,
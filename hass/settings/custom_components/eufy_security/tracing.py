@@ -0,0 +1,208 @@
+import logging
+import os
+from random import random
+from time import perf_counter, time
+
+from homeassistant.core import HomeAssistant
+
+from .codec import dumps
+from .const import TRACE_BUFFER_SIZE, TRACE_FILE_MAX_SIZE
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class Span:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace, name: str) -> None:
+        self.trace = trace
+        self.name: str = name
+        self.started: float = None
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.trace.spans[self.name] = round((perf_counter() - self.started) * 1e6, 1)
+
+
+class Trace:
+    """Span durations, in microseconds, of one sampled pass through the pipeline."""
+
+    __slots__ = (
+        "tracer",
+        "kind",
+        "timestamp",
+        "started",
+        "attributes",
+        "spans",
+        "deferred",
+        "discarded",
+    )
+
+    def __init__(self, tracer, kind: str) -> None:
+        self.tracer = tracer
+        self.kind: str = kind
+        self.timestamp: float = time()
+        self.started: float = perf_counter()
+        self.attributes: dict = {}
+        self.spans: dict = {}
+        self.deferred: bool = False
+        self.discarded: bool = False
+
+    def span(self, name: str) -> Span:
+        return Span(self, name)
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def defer(self) -> None:
+        # the message changed a state, finish once the entities are written
+        self.deferred = True
+
+    def sample(self, rate: float) -> None:
+        # keep only a share of frequent traces, such as stream frames
+        if random() >= rate:
+            self.discarded = True
+
+    def finish(self) -> None:
+        if self.discarded is True:
+            self.tracer.skipped = self.tracer.skipped + 1
+            return
+        if self.deferred is True:
+            self.tracer.defer(self)
+            return
+        self.tracer.add_record(
+            {
+                "ts": self.timestamp,
+                "kind": self.kind,
+                **self.attributes,
+                "spans": self.spans,
+            }
+        )
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+class NullTrace:
+    """Stand-in for traces that were not sampled, every call is a no-op."""
+
+    __slots__ = ()
+
+    def span(self, name: str) -> NullSpan:
+        return NULL_SPAN
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def defer(self) -> None:
+        pass
+
+    def sample(self, rate: float) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+NULL_TRACE = NullTrace()
+
+
+class Tracer:
+    """Sample traces and append them to a JSONL file.
+
+    Finished traces are buffered in memory and written by flush() from the
+    executor, so the event loop never touches the file. When the buffer is
+    full, new traces are dropped and counted instead. The file is rotated to
+    a single .1 backup once it reaches TRACE_FILE_MAX_SIZE.
+
+    Traces of messages that changed a state wait for the next entity write,
+    which is added to them as the entity_write span, and the time they
+    waited for it as write_wait.
+    """
+
+    def __init__(self, hass: HomeAssistant, sample_rate: float, path: str) -> None:
+        self.hass: HomeAssistant = hass
+        self.sample_rate: float = sample_rate
+        self.path: str = path
+        self.buffer: list = []
+        self.deferred: list = []
+        self.sampled: int = 0
+        self.skipped: int = 0
+        self.exported: int = 0
+        self.dropped: int = 0
+
+    def start_trace(self, kind: str):
+        if self.sample_rate <= 0 or random() >= self.sample_rate:
+            return NULL_TRACE
+        self.sampled = self.sampled + 1
+        return Trace(self, kind)
+
+    def add_record(self, record: dict) -> None:
+        if len(self.buffer) >= TRACE_BUFFER_SIZE:
+            self.dropped = self.dropped + 1
+            return
+        self.buffer.append(record)
+
+    def defer(self, trace: Trace) -> None:
+        if len(self.deferred) >= TRACE_BUFFER_SIZE:
+            self.dropped = self.dropped + 1
+            return
+        self.deferred.append(trace)
+
+    def finish_entity_write(self, started: float) -> None:
+        """Finish the deferred traces with the entity write that started at started."""
+        if len(self.deferred) == 0:
+            return
+        finished = perf_counter()
+        traces, self.deferred = self.deferred, []
+        for trace in traces:
+            trace.spans["write_wait"] = round((started - trace.started) * 1e6, 1)
+            trace.spans["entity_write"] = round((finished - started) * 1e6, 1)
+            trace.deferred = False
+            trace.finish()
+
+    async def async_flush(self, event_time_utc=None) -> None:
+        if len(self.buffer) == 0:
+            return
+        records, self.buffer = self.buffer, []
+        lines = "".join(dumps(record) + "\n" for record in records)
+        try:
+            await self.hass.async_add_executor_job(self.write, lines)
+            self.exported = self.exported + len(records)
+        except OSError as ex:
+            self.dropped = self.dropped + len(records)
+            _LOGGER.warning("Unable to write traces to %s: %s", self.path, ex)
+
+    def write(self, lines: str) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size > 0 and size + len(lines) > TRACE_FILE_MAX_SIZE:
+            os.replace(self.path, f"{self.path}.1")
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+    @property
+    def statistics(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "path": self.path if self.sample_rate > 0 else None,
+            "sampled": self.sampled,
+            "skipped": self.skipped,
+            "awaiting_entity_write": len(self.deferred),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "buffered": len(self.buffer),
+        }
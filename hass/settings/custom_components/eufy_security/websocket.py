@@ -1,11 +1,12 @@
 import asyncio
 import logging
+from time import monotonic
 import traceback
 from typing import Any, Callable, Coroutine, Text
 
 import aiohttp
 
-from .const import DOMAIN
+from .const import DOMAIN, SEND_QUEUE_SIZE
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -35,11 +36,28 @@ class EufySecurityWebSocket:
         self.ws: aiohttp.ClientWebSocketResponse = None
         self.loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
 
+        # outbound messages are written by a single task, see process_send_queue
+        self.send_queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.writer_task: asyncio.Task = None
+        self.closed: asyncio.Future = None
+        self.connected_at: float = None
+        self.messages_sent: int = 0
+        self.bytes_sent: int = 0
+        self.queue_peak: int = 0
+
     async def connect(self):
         _LOGGER.debug(f"{DOMAIN} - set_ws - connect")
         self.ws: aiohttp.ClientWebSocketResponse = await self.session.ws_connect(
             self.base, autoclose=False, autoping=True, heartbeat=60
         )
+        self.connected_at = monotonic()
+        # messages queued by senders that lost the race against the last close
+        pending = []
+        while not self.send_queue.empty():
+            pending.append(self.send_queue.get_nowait())
+        self.fail_pending(pending)
+        self.closed = self.loop.create_future()
+        self.writer_task = self.loop.create_task(self.process_send_queue())
         task = self.loop.create_task(self.process_messages())
         task.add_done_callback(self.on_close)
         await self.async_on_open()
@@ -62,6 +80,59 @@ class EufySecurityWebSocket:
                     msg,
                 )
 
+    async def process_send_queue(self):
+        _LOGGER.debug(f"{DOMAIN} - process_send_queue started")
+        while True:
+            batch = [await self.send_queue.get()]
+            while not self.send_queue.empty():
+                batch.append(self.send_queue.get_nowait())
+            try:
+                for message, sent in batch:
+                    try:
+                        # send_str waits for the transport to drain when its buffer is full,
+                        # which in turn keeps the bounded queue from being emptied
+                        await self.ws.send_str(message)
+                        self.messages_sent = self.messages_sent + 1
+                        self.bytes_sent = self.bytes_sent + len(message)
+                        _LOGGER.debug("%s - WebSocket message sent. %s", DOMAIN, message)
+                        if not sent.done():
+                            sent.set_result(None)
+                    except Exception as ex:  # pylint: disable=broad-except
+                        _LOGGER.error(
+                            "%s - Exception - process_send_queue: %s - message: %s",
+                            DOMAIN,
+                            ex,
+                            message,
+                        )
+                        if not sent.done():
+                            sent.set_exception(ex)
+                    finally:
+                        self.send_queue.task_done()
+            finally:
+                # cancelled by on_close in the middle of a batch
+                self.fail_pending(batch)
+
+    def fail_pending(self, items: list) -> None:
+        for message, sent in items:
+            if not sent.done():
+                sent.set_exception(
+                    ConnectionError(f"{DOMAIN} - WebSocket closed before sending {message}")
+                )
+
+    @property
+    def statistics(self) -> dict:
+        bytes_per_second = None
+        if self.connected_at is not None:
+            elapsed = max(monotonic() - self.connected_at, 1)
+            bytes_per_second = round(self.bytes_sent / elapsed, 1)
+        return {
+            "queue_depth": self.send_queue.qsize(),
+            "queue_peak": self.queue_peak,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_second": bytes_per_second,
+        }
+
     async def on_message(self, message):
         if self.message_callback is not None:
             await self.message_callback(message)
@@ -78,10 +149,38 @@ class EufySecurityWebSocket:
         _LOGGER.debug(
             f"{DOMAIN} - WebSocket Connection Closed. %s", self.close_callback
         )
+        if self.writer_task is not None:
+            self.writer_task.cancel()
+            self.writer_task = None
+        if self.closed is not None and not self.closed.done():
+            # wakes the senders waiting for room in the queue
+            self.closed.set_result(None)
+        # nothing writes the queue until the next connect, fail its senders now
+        pending = []
+        while not self.send_queue.empty():
+            pending.append(self.send_queue.get_nowait())
+        self.fail_pending(pending)
         if self.close_callback is not None:
             self.ws = None
             asyncio.run_coroutine_threadsafe(self.close_callback(), self.loop)
 
     async def send_message(self, message):
-        _LOGGER.debug(f"{DOMAIN} - WebSocket message sent. %s", message)
-        await self.ws.send_str(message)
+        if self.writer_task is None or self.ws is None or self.ws.closed:
+            raise ConnectionError(f"{DOMAIN} - WebSocket is not connected")
+        closed = self.closed
+        sent = self.loop.create_future()
+        if self.send_queue.full():
+            # blocks the caller until the writer drained the socket, or it closed
+            put = self.loop.create_task(self.send_queue.put((message, sent)))
+            try:
+                await asyncio.wait((put, closed), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                put.cancel()
+            if closed.done():
+                sent.cancel()
+                raise ConnectionError(f"{DOMAIN} - WebSocket closed before sending {message}")
+        else:
+            self.send_queue.put_nowait((message, sent))
+        self.queue_peak = max(self.queue_peak, self.send_queue.qsize())
+        # resolved by process_send_queue once written, so send errors reach the caller
+        await sent